@@ -1,13 +1,27 @@
 from flask import Flask
-from .config import Config, configure_logging
-from .routes import main_bp
+from .assets import init_assets
+from .cache import init_memory_tier
+from .cli import init_cli
+from .config import configure_logging, load_config
+from .metrics import init_metrics
+from .routes import main_bp, metrics_endpoint
+from .scheduler import init_scheduler
 
 
 def create_app():
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_mapping(load_config())
     app.register_blueprint(main_bp)
+    # the same routes per household, e.g. /households/smith/dashboard
+    app.register_blueprint(main_bp, name="tenant", url_prefix="/households/<tenant>")
+    # covers all households, so not part of the per-household routes
+    app.add_url_rule("/metrics", view_func=metrics_endpoint)
 
     configure_logging(app)
+    init_metrics(app)
+    init_cli(app)
+    init_assets(app)
+    init_memory_tier(app.config["APP_CONFIG"])
+    init_scheduler(app.config["APP_CONFIG"], app.config["TENANT_CONFIGS"])
 
     return app
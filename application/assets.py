@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+from pathlib import Path
+
+from flask import Flask, request, send_from_directory
+
+# fingerprinted copies and the manifest live here, under the static folder
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+
+# sources of built assets, not served themselves
+SKIP = {"css/input.css"}
+
+COMPRESSIBLE = {".css", ".js", ".svg"}
+
+# a year; fingerprinted files never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def fingerprint(path: Path) -> str:
+    """Return the first 12 hex digits of the sha256 of a file's contents."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def build_assets(static_dir: Path) -> dict[str, str]:
+    """Copy static files to static/dist under content-hashed names, with
+    gzip (and brotli, if installed) precompressed variants of text assets,
+    and write a manifest mapping each file to its hashed copy.
+
+    Args:
+        static_dir (Path): Flask static folder
+
+    Returns:
+        dict[str, str]: Manifest of static filenames to dist filenames
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    static_dir = Path(static_dir)
+    dist_dir = static_dir / DIST_DIR
+    shutil.rmtree(dist_dir, ignore_errors=True)
+
+    manifest = {}
+    for path in sorted(static_dir.rglob("*")):
+        name = path.relative_to(static_dir).as_posix()
+        if not path.is_file() or name.startswith(f"{DIST_DIR}/") or name in SKIP:
+            continue
+
+        hashed = f"{path.stem}.{fingerprint(path)}{path.suffix}"
+        target = dist_dir / path.parent.relative_to(static_dir) / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+
+        if path.suffix in COMPRESSIBLE:
+            data = path.read_bytes()
+            # mtime=0 so rebuilding unchanged files gives identical output
+            target.with_name(f"{hashed}.gz").write_bytes(
+                gzip.compress(data, compresslevel=9, mtime=0)
+            )
+            if brotli is not None:
+                target.with_name(f"{hashed}.br").write_bytes(brotli.compress(data))
+
+        manifest[name] = f"{DIST_DIR}/{target.relative_to(dist_dir).as_posix()}"
+
+    (dist_dir / MANIFEST).write_text(json.dumps(manifest, indent=4))
+    return manifest
+
+
+def load_manifest(static_dir: Path) -> dict[str, str]:
+    """Return the asset manifest, or an empty one if assets were never built."""
+    try:
+        return json.loads((Path(static_dir) / DIST_DIR / MANIFEST).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app: Flask):
+    """Point url_for('static', ...) at fingerprinted assets and serve those
+    precompressed, with Cache-Control: immutable.
+    Does nothing in debug mode or before the assets are built, so files
+    edited while developing are served as they are.
+    """
+    manifest = load_manifest(app.static_folder)
+    if app.debug or not manifest:
+        return
+
+    hashed_files = set(manifest.values())
+    serve_static = app.view_functions["static"]
+
+    @app.url_defaults
+    def fingerprint_static(endpoint: str, values: dict):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def static(filename: str):
+        if filename not in hashed_files:
+            return serve_static(filename=filename)
+
+        mimetype, _ = mimetypes.guess_type(filename)
+        encoding = None
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if (
+                request.accept_encodings[candidate]
+                and Path(app.static_folder, f"{filename}{suffix}").is_file()
+            ):
+                encoding = candidate
+                filename = f"{filename}{suffix}"
+                break
+
+        response = send_from_directory(
+            app.static_folder,
+            filename,
+            mimetype=mimetype,
+            max_age=IMMUTABLE_MAX_AGE,
+        )
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static
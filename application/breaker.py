@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing or responding slowly.
+    The outcomes of the last `window` calls are kept; a call is bad if it
+    raised or took longer than slow_call_seconds. Once min_calls are recorded
+    and the share of bad ones reaches failure_rate, the circuit opens and calls
+    fail fast with CircuitOpen. After open_seconds a single probe call is let
+    through (half-open): if it is good the circuit closes, else it opens again.
+    State is kept per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5,
+        window: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        logger.warning(
+            f"Circuit for {self.name} opened; skipping calls for {self.open_seconds}s"
+        )
+
+    def _retry_in(self) -> float:
+        return self._opened_at + self.open_seconds - time.monotonic()
+
+    def allow(self):
+        """Fail fast while the circuit is open, without claiming a probe.
+
+        Raises:
+            CircuitOpen: If calls to the upstream are being skipped
+        """
+        with self._lock:
+            if self.state == OPEN and self._retry_in() > 0:
+                raise CircuitOpen(f"Circuit for {self.name} is open")
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if self._retry_in() > 0:
+                    raise CircuitOpen(f"Circuit for {self.name} is open")
+                self.state = HALF_OPEN
+                logger.info(f"Circuit for {self.name} half-open; probing upstream")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpen(f"Circuit for {self.name} is half-open")
+                self._probing = True
+
+    def record(self, elapsed: float, ok: bool):
+        """Record the outcome of a call, opening or closing the circuit.
+
+        Args:
+            elapsed (float): Seconds the call took
+            ok (bool): False if the call raised
+        """
+        bad = not ok or elapsed > self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if bad:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    logger.info(f"Circuit for {self.name} closed")
+                return
+
+            self._outcomes.append(bad)
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+            ):
+                self._open()
+
+    @contextmanager
+    def call(self):
+        """Guard one upstream call, timing it and recording its outcome.
+
+        Raises:
+            CircuitOpen: If the circuit is open, or half-open with a probe in flight
+        """
+        self._before_call()
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(time.perf_counter() - start, ok)
@@ -0,0 +1,109 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable
+
+from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: str) -> str:
+    """Format a server-sent event; every line of data gets its own data field."""
+    lines = "".join(f"data: {line}\n" for line in data.splitlines())
+    return f"event: {event}\n{lines}\n"
+
+
+class Broadcaster:
+    """Fans out freshly rendered widget fragments to every connected panel.
+
+    One watcher thread per process renders each widget every poll_interval
+    seconds (a memory-tier hit unless the cache changed) and publishes the
+    fragment only when its ETag differs from the last one rendered, so a
+    cache turning degraded ("stale since") is pushed too. After a failed
+    render the next good one is always pushed, replacing the error panels
+    show in its place.
+    Since workers share the cache store, a refresh in any worker reaches the
+    panels connected to every worker.
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, Callable[[], tuple[int, str, str]]],
+        poll_interval: float = 5,
+        queue_size: int = 8,
+    ):
+        self.sources = sources
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: set[queue.Queue] = set()
+        # ETag of each source's last render, None if it failed
+        self._versions: dict[str, str | None] = {}
+        self._thread = None
+
+    def subscribe(self, app: Flask, stream_config: dict | None = None) -> queue.Queue:
+        """Register a panel connection, starting the watcher on first use.
+
+        Args:
+            stream_config (dict, optional): stream section of the household's
+                config, read for poll_interval when the watcher starts
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                stream_config = stream_config or {}
+                self.poll_interval = stream_config.get(
+                    "poll_interval", self.poll_interval
+                )
+                self._thread = threading.Thread(
+                    target=self._watch, args=(app,), name="sse-watcher", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: str):
+        """Queue an event for every subscriber, dropping the oldest for slow ones."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def poll(self):
+        """Render every source and publish the ones whose data changed."""
+        for name, render in self.sources.items():
+            try:
+                _, html, etag = render()
+            except Exception as e:
+                logger.error(f"Failed to render {name} for stream: {e}")
+                self._versions[name] = None
+                continue
+            # the first render is what panels already show
+            previous = self._versions.get(name, etag)
+            self._versions[name] = etag
+            if previous != etag:
+                logger.info(f"Pushing updated {name} to stream subscribers")
+                self.publish(name, html)
+
+    def _watch(self, app: Flask):
+        while True:
+            with self._lock:
+                idle = not self._subscribers
+            if not idle:
+                with app.app_context():
+                    self.poll()
+            time.sleep(self.poll_interval)
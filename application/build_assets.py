@@ -0,0 +1,9 @@
+"""Build fingerprinted, precompressed static assets: python -m application.build_assets"""
+
+from pathlib import Path
+
+from .assets import build_assets
+
+if __name__ == "__main__":
+    manifest = build_assets(Path(__file__).parent / "static")
+    print(f"Built {len(manifest)} assets")
@@ -0,0 +1,266 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .breaker import CircuitOpen
+from .metrics import CACHE_EVENTS
+from .serialization import IncompatibleCache, dumps, loads
+from .singleflight import refresh_group
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+CacheModel = TypeVar("CacheModel", bound=BaseModel)
+
+
+class MemoryEntry:
+    """Validated cache model (and views derived from it) for one store version."""
+
+    def __init__(self, version: tuple, model: BaseModel):
+        self.version = version
+        self.model = model
+        self.views: dict[str, Any] = {}
+
+
+class LRUCache:
+    """Thread-safe mapping holding at most maxsize entries, evicting the least
+    recently used, so memory stays bounded however many tenants are served.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# per-process memory tier, keyed on store key
+_memory = LRUCache(maxsize=64)
+
+
+def init_memory_tier(app_config: dict):
+    """Size the memory tier from memory_cache_entries (default 64 caches)."""
+    _memory.maxsize = app_config.get("memory_cache_entries", 64)
+
+
+def read_cache(config: dict, model: type[CacheModel]) -> CacheModel | None:
+    """Read and validate the cache entry, if available.
+    The validated model is kept in memory and reused until the store version
+    changes, so a hit costs one stat call.
+
+    Args:
+        model (type[CacheModel]): Pydantic model the cache entry holds
+
+    Returns:
+        CacheModel | None: Cached data, or None if missing or unreadable
+    """
+    store = get_store(config)
+    try:
+        version = store.version()
+        entry = _memory.get(store.key)
+        if entry is not None and entry.version == version:
+            return entry.model
+
+        cache_data = loads(store.read(), model)
+    except IncompatibleCache as e:
+        logger.info(f"Ignoring cache from another version: {e}")
+        return None
+    except (ValidationError, FileNotFoundError, sqlite3.Error) as e:
+        logger.error(e)
+        return None
+
+    _memory[store.key] = MemoryEntry(version, cache_data)
+    return cache_data
+
+
+def cache_name(model: type[BaseModel]) -> str:
+    """Return the label used for a cache in metrics, e.g. WeatherCache -> weather."""
+    return model.__name__.removesuffix("Cache").lower()
+
+
+def read_timestamp(config: dict) -> int | None:
+    """Return the timestamp of the cache entry without loading its data.
+
+    Returns:
+        int | None: Timestamp of the cached data, or None if missing
+    """
+    try:
+        return get_store(config).timestamp()
+    except (FileNotFoundError, IncompatibleCache, sqlite3.Error):
+        return None
+
+
+def write_cache(config: dict, cache_data: BaseModel):
+    """Persist cache data atomically so concurrent readers never see a partial write."""
+    get_store(config).write(dumps(cache_data), cache_data.timestamp)
+
+
+def cached_view(
+    config: dict, cache_data: CacheModel, build: Callable[[dict, CacheModel], Any]
+) -> Any:
+    """Return build(config, cache_data), computed once per cache version.
+    Callers must treat the returned view as read-only since it is shared.
+
+    Args:
+        cache_data (CacheModel): Model returned by get_cached
+        build (Callable): Derives the view (e.g. template dict) from the model
+
+    Returns:
+        Any: The derived view
+    """
+    entry = _memory.get(get_store(config).key)
+    if entry is None or entry.model is not cache_data:
+        return build(config, cache_data)
+
+    key = f"{build.__module__}.{build.__qualname__}"
+    view = entry.views.get(key)
+    if view is None:
+        view = entry.views[key] = build(config, cache_data)
+    return view
+
+
+def is_fresh(config: dict, cache_data: BaseModel, margin: float = 0) -> bool:
+    """Return True if the cache stays within the configured TTL for margin more seconds."""
+    return time.time() + margin < cache_data.timestamp + config["cache_ttl"]
+
+
+def is_servable(config: dict, cache_data: BaseModel) -> bool:
+    """Return True if the cache may still be served while it is refreshed.
+    Uses the optional hard TTL; without one, stale caches are never served.
+    """
+    hard_ttl = config.get("cache_hard_ttl", config["cache_ttl"])
+    return time.time() < cache_data.timestamp + hard_ttl
+
+
+def is_degraded(config: dict, cache_data: BaseModel) -> bool:
+    """Return True if the cache is past its hard TTL, which get_cached only
+    returns while the upstream's circuit is open.
+    """
+    return not is_servable(config, cache_data)
+
+
+def degraded_view(config: dict, cache_data: BaseModel, view: dict) -> dict:
+    """Mark a view as stale if its cache is degraded, without touching the
+    shared view.
+    """
+    if is_degraded(config, cache_data):
+        return {**view, "stale": True}
+    return view
+
+
+def _refresh_args(
+    config: dict,
+    model: type[CacheModel],
+    update: Callable[[dict], CacheModel],
+    margin: float = 0,
+) -> tuple:
+    """Build the single-flight key, lock path, refresh, re-check and coalesced
+    callables. Callers sharing another thread's or worker's refresh are both
+    counted as coalesced.
+    """
+
+    name = cache_name(model)
+
+    def refresh() -> CacheModel:
+        CACHE_EVENTS.labels(name, "refresh").inc()
+        return update(config)
+
+    def recheck() -> CacheModel | None:
+        cache_data = read_cache(config, model)
+        if cache_data is not None and is_fresh(config, cache_data, margin):
+            return cache_data
+        return None
+
+    def coalesced():
+        CACHE_EVENTS.labels(name, "coalesced").inc()
+
+    cache_file = str(config["cache_file"])
+    return cache_file, f"{cache_file}.lock", refresh, recheck, coalesced
+
+
+def refresh_cache(
+    config: dict,
+    model: type[CacheModel],
+    update: Callable[[dict], CacheModel],
+    margin: float = 0,
+) -> CacheModel:
+    """Refresh the cache, coalescing concurrent refreshes across threads and workers.
+
+    Args:
+        model (type[CacheModel]): Pydantic model the cache entry holds
+        update (Callable): Calls upstream APIs and writes the cache entry
+        margin (float): Skip the refresh if the cache stays fresh this many more seconds
+
+    Returns:
+        CacheModel: Refreshed cache data
+    """
+    return refresh_group.do(*_refresh_args(config, model, update, margin))
+
+
+def get_cached(
+    config: dict,
+    model: type[CacheModel],
+    update: Callable[[dict], CacheModel],
+) -> CacheModel:
+    """Get cached data if fresh. Else refresh cache and return results.
+    Between the soft TTL (cache_ttl) and hard TTL (cache_hard_ttl), the stale
+    cache is returned immediately and refreshed in the background. Past the
+    hard TTL the last good cache is still returned if the upstream's circuit
+    is open, rather than failing.
+
+    Args:
+        model (type[CacheModel]): Pydantic model the cache entry holds
+        update (Callable): Calls upstream APIs and writes the cache entry
+
+    Returns:
+        CacheModel: Cached or refreshed data
+    """
+    name = cache_name(model)
+    cache_data = read_cache(config, model)
+    if cache_data is None:
+        CACHE_EVENTS.labels(name, "miss").inc()
+        return refresh_cache(config, model, update)
+
+    if is_fresh(config, cache_data):
+        CACHE_EVENTS.labels(name, "hit").inc()
+        logger.info("Using fresh cache.", extra={"sampled": True})
+        return cache_data
+    elif is_servable(config, cache_data):
+        CACHE_EVENTS.labels(name, "stale").inc()
+        logger.info("Cache stale. Serving stale cache and refreshing in background.")
+        refresh_group.do_in_background(*_refresh_args(config, model, update))
+        return cache_data
+    else:
+        CACHE_EVENTS.labels(name, "expired").inc()
+        logger.info("Cache expired. Refreshing cache.")
+        try:
+            return refresh_cache(config, model, update)
+        except CircuitOpen as e:
+            CACHE_EVENTS.labels(name, "degraded").inc()
+            logger.warning(f"{e}. Serving last good cache.")
+            return cache_data
@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+from datetime import date, datetime
+from typing import Iterator
+
+from .store import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def store_file(config: dict) -> str:
+    """Return path of the local event store used for incremental sync."""
+    return config.get("sync_store_file", f"{config['cache_file']}.sync.json")
+
+
+def load_store(config: dict) -> dict:
+    """Load per-calendar sync tokens and events from the local event store.
+
+    Returns:
+        dict: {calendar_id: {"sync_token", "full_sync_at", "events": {event_id: event}}}
+    """
+    try:
+        with open(store_file(config), "rt") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.decoder.JSONDecodeError) as e:
+        logger.error(e)
+        return {}
+
+
+def save_store(config: dict, store: dict):
+    """Persist sync tokens and events to the local event store."""
+    atomic_write(store_file(config), json.dumps(store))
+
+
+def iter_pages(service, http, **params) -> Iterator[dict]:
+    """Yield each page of an events.list call, following nextPageToken.
+    The next page is only requested once the caller has consumed this one.
+
+    Yields:
+        dict: One events.list response
+    """
+    page_token = None
+    while True:
+        result = (
+            service.events().list(pageToken=page_token, **params).execute(http=http)
+        )
+        yield result
+        page_token = result.get("nextPageToken")
+        if page_token is None:
+            return
+
+
+def list_pages(service, http, **params) -> tuple[list[dict], str | None]:
+    """Follow nextPageToken through all pages of an events.list call.
+
+    Returns:
+        tuple[list[dict], str | None]: All items and the final nextSyncToken
+    """
+    items = []
+    for result in iter_pages(service, http, **params):
+        items.extend(result.get("items", []))
+    return items, result.get("nextSyncToken")
+
+
+def ended_before(e: dict, start_dt: datetime) -> bool:
+    """Return True if the event ends at or before start_dt.
+    Full day events end on an exclusive date, so they last through start_dt's day.
+    """
+    if "dateTime" in e["end"]:
+        return datetime.fromisoformat(e["end"]["dateTime"]) <= start_dt
+    return date.fromisoformat(e["end"]["date"]) <= start_dt.date()
+
+
+def sync_events(
+    config: dict,
+    store: dict,
+    calendar_id: str,
+    start_dt: datetime,
+    service,
+    http=None,
+) -> list[dict]:
+    """Bring the stored events of one calendar up to date and return them.
+    Uses the calendar's sync token when available so only changed and deleted
+    events are transferred. Falls back to a full sync from start_dt when there
+    is no token, the token is older than full_sync_interval, or Google answers
+    410 Gone.
+
+    Args:
+        store (dict): Event store from load_store; updated in place
+        calendar_id (str): Google's ID of the calendar
+        start_dt (datetime): Events ending before this are dropped
+
+    Returns:
+        list[dict]: Stored events of the calendar, in Google API format
+    """
+    state = store.get(calendar_id)
+    full_sync_due = (
+        state is None
+        or state.get("sync_token") is None
+        or time.time() - state["full_sync_at"]
+        > config.get("full_sync_interval", 24 * 60 * 60)
+    )
+
+    from googleapiclient.errors import HttpError
+
+    items = None
+    if not full_sync_due:
+        logger.info(f"Incremental sync of Google calendar '{calendar_id}'")
+        try:
+            items, sync_token = list_pages(
+                service,
+                http,
+                calendarId=calendar_id,
+                singleEvents=True,
+                syncToken=state["sync_token"],
+            )
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            logger.info(f"    Sync token for '{calendar_id}' expired")
+
+    if items is None:
+        logger.info(f"Full sync of Google calendar '{calendar_id}'")
+        items, sync_token = list_pages(
+            service,
+            http,
+            calendarId=calendar_id,
+            singleEvents=True,
+            timeMin=start_dt.isoformat(),
+        )
+        state = {"full_sync_at": time.time(), "events": {}}
+
+    changed = deleted = 0
+    for e in items:
+        if e.get("status") == "cancelled":
+            deleted += state["events"].pop(e["id"], None) is not None
+        else:
+            state["events"][e["id"]] = e
+            changed += 1
+    logger.info(f"    {changed} changed, {deleted} deleted events from Google Calendar")
+
+    state["events"] = {
+        event_id: e
+        for event_id, e in state["events"].items()
+        if not ended_before(e, start_dt)
+    }
+    state["sync_token"] = sync_token
+    store[calendar_id] = state
+
+    return list(state["events"].values())
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+
+import click
+from flask import Flask
+
+# run in a fresh interpreter so nothing is already imported
+BOOT_SCRIPT = """
+import time
+start = time.perf_counter()
+from application import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(imported - start, created - imported)
+"""
+
+
+def measure_boot() -> dict:
+    """Import the app and call create_app in a fresh interpreter, timing both.
+
+    Returns:
+        dict: import_s and create_app_s in seconds, plus modules as a list of
+            (module, cumulative import seconds) for the application's imports
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_s, create_app_s = map(float, result.stdout.split())
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(cumulative) / 1e6))
+
+    return {"import_s": import_s, "create_app_s": create_app_s, "modules": modules}
+
+
+@click.command("boot-report")
+@click.option("--top", default=15, help="Number of slowest imports to list.")
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+def boot_report(top: int, as_json: bool):
+    """Report how long a cold worker takes to import and create the app."""
+    report = measure_boot()
+    report["modules"] = sorted(report["modules"], key=lambda m: m[1], reverse=True)[
+        :top
+    ]
+
+    if as_json:
+        click.echo(json.dumps(report, indent=4))
+        return
+
+    click.echo(f"import application  {report['import_s'] * 1000:8.1f} ms")
+    click.echo(f"create_app()        {report['create_app_s'] * 1000:8.1f} ms")
+    click.echo("\nSlowest imports (cumulative):")
+    for name, seconds in report["modules"]:
+        click.echo(f"{seconds * 1000:8.1f} ms  {name}")
+
+
+def init_cli(app: Flask):
+    app.cli.add_command(boot_report)
@@ -0,0 +1,212 @@
+import functools
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .breaker import CircuitBreaker
+from .ratelimit import RateBudget
+
+# the Google client stack and requests take a few hundred ms to import, so
+# they are imported on first use rather than when a worker boots
+if TYPE_CHECKING:
+    import requests
+    from google.oauth2 import service_account
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+
+_lock = threading.Lock()
+_credentials: dict[str, "service_account.Credentials"] = {}
+# one lock per key file, so a slow token refresh doesn't hold up _lock
+_credential_locks: dict[str, threading.Lock] = {}
+_calendar_services: dict[tuple[str, str | None], object] = {}
+_http_pools: dict[tuple[str, float], queue.SimpleQueue] = {}
+_weather_sessions: dict[str, "requests.Session"] = {}
+_weather_budgets: dict[str, RateBudget] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_credentials(config: dict) -> "service_account.Credentials":
+    """Return process-wide service account credentials with a valid token.
+    The key file is read once; the token is only re-minted when google-auth
+    considers it close to expiry, with a timeout of calendar_timeout. Refreshes
+    hold a lock of their own key file only, so other clients aren't held up by
+    a slow token endpoint.
+
+    Returns:
+        service_account.Credentials: Credentials for the Calendar API
+    """
+    import google.auth.transport.requests
+    from google.oauth2 import service_account
+
+    key_file = str(config["key_file"])
+    with _lock:
+        key_lock = _credential_locks.setdefault(key_file, threading.Lock())
+
+    with key_lock:
+        credentials = _credentials.get(key_file)
+        if credentials is None:
+            credentials = service_account.Credentials.from_service_account_file(
+                key_file, scopes=CALENDAR_SCOPES
+            )
+            _credentials[key_file] = credentials
+
+        if not credentials.valid:
+            logger.info("Refreshing Google service account token")
+            # google-auth waits up to 120s on the token endpoint by default
+            request = functools.partial(
+                google.auth.transport.requests.Request(),
+                timeout=config.get("calendar_timeout", 10),
+            )
+            credentials.refresh(request)
+
+    return credentials
+
+
+def get_calendar_service(config: dict):
+    """Return a process-wide Calendar API client.
+    Built from the discovery document bundled with google-api-python-client,
+    so no discovery request is made. The optional calendar_api_endpoint setting
+    points the client at another server (e.g. a local stand-in).
+
+    Returns:
+        googleapiclient.discovery.Resource: Calendar v3 service
+    """
+    from googleapiclient.discovery import build
+
+    api_endpoint = config.get("calendar_api_endpoint")
+    service_key = (str(config["key_file"]), api_endpoint)
+    credentials = get_credentials(config)
+    with _lock:
+        service = _calendar_services.get(service_key)
+        if service is None:
+            service = build(
+                "calendar",
+                "v3",
+                credentials=credentials,
+                static_discovery=True,
+                cache_discovery=False,
+                client_options={"api_endpoint": api_endpoint},
+            )
+            _calendar_services[service_key] = service
+
+    return service
+
+
+@contextmanager
+def calendar_http(config: dict):
+    """Check out an authorized http transport from a per-key-file pool.
+    httplib2 connections are not thread-safe, so each concurrent request needs
+    its own transport; returning it to the pool keeps its connections alive for
+    the next refresh.
+
+    Yields:
+        AuthorizedHttp: Transport with socket timeout calendar_timeout
+    """
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+
+    timeout = config.get("calendar_timeout", 10)
+    pool_key = (str(config["key_file"]), timeout)
+    with _lock:
+        pool = _http_pools.setdefault(pool_key, queue.SimpleQueue())
+
+    try:
+        http = pool.get_nowait()
+    except queue.Empty:
+        http = AuthorizedHttp(
+            get_credentials(config), http=httplib2.Http(timeout=timeout)
+        )
+
+    try:
+        yield http
+    finally:
+        pool.put(http)
+
+
+def get_weather_session(config: dict) -> "requests.Session":
+    """Return a process-wide keep-alive session for the OpenWeather API.
+    Idempotent GETs are retried with exponential backoff on connection errors
+    and on 429/5xx responses.
+
+    Returns:
+        requests.Session: Session with a pooled, retrying adapter for base_url
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    base_url = config["base_url"]
+    with _lock:
+        session = _weather_sessions.get(base_url)
+        if session is None:
+            retry = Retry(
+                total=config.get("retries", 2),
+                backoff_factor=config.get("retry_backoff", 0.5),
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+            )
+            session = requests.Session()
+            # both endpoints for each location refreshed at once; the scheduler
+            # refreshes up to scheduler.concurrency locations together
+            pool_maxsize = 2 * config.get("location_concurrency", 4)
+            session.mount(
+                base_url, HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+            )
+            _weather_sessions[base_url] = session
+
+    return session
+
+
+def weather_timeout(config: dict) -> tuple[float, float]:
+    """Return (connect, read) timeouts in seconds for OpenWeather requests."""
+    return (config.get("connect_timeout", 3.05), config.get("read_timeout", 10))
+
+
+def get_weather_budget(config: dict) -> RateBudget | None:
+    """Return the OpenWeather call budget shared by all locations and workers.
+    Allows rate_limit_per_minute calls (default 60, the free tier limit); the
+    bucket is kept in rate_limit_file, next to the cache by default.
+
+    Returns:
+        RateBudget | None: Shared budget, or None if rate_limit_per_minute is 0
+    """
+    rate = config.get("rate_limit_per_minute", 60)
+    if not rate:
+        return None
+
+    path = str(
+        config.get("rate_limit_file")
+        or Path(config["cache_file"]).parent / "openweather.budget"
+    )
+    with _lock:
+        budget = _weather_budgets.get(path)
+        if budget is None:
+            budget = _weather_budgets[path] = RateBudget(path, rate)
+
+    return budget
+
+
+def get_breaker(upstream: str, config: dict) -> CircuitBreaker:
+    """Return the circuit breaker guarding calls to an upstream in this process.
+    Settings come from the optional circuit_breaker section of the first
+    config asking for it; every location and household shares the breaker.
+
+    Args:
+        upstream (str): Name of the upstream, e.g. openweather
+
+    Returns:
+        CircuitBreaker: Breaker shared by all callers of the upstream
+    """
+    with _lock:
+        breaker = _breakers.get(upstream)
+        if breaker is None:
+            breaker = _breakers[upstream] = CircuitBreaker(
+                upstream, **(config.get("circuit_breaker") or {})
+            )
+
+    return breaker
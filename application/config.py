@@ -1,14 +1,43 @@
+import _thread
+import array
+import atexit
+import fcntl
+import functools
+import itertools
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import multiprocessing.queues
+import multiprocessing.reduction
+import os
+import queue
+import re
+import select
+import sys
+import termios
 from pathlib import Path
 
-import yaml
+from .locations import get_location_matcher
 
 
 app_dir = Path(__file__).parent
 config_file_path = app_dir / "config.yaml"
 
-with open(config_file_path, "rt") as config_file:
-    config_data = yaml.safe_load(config_file)
+
+@functools.cache
+def load_config() -> dict:
+    """Read config.yaml on first use and resolve relative paths.
+    Cached, so the file is parsed once per process; under gunicorn's
+    preload_app that happens in the master and workers share the result.
+
+    Returns:
+        dict: Settings for flask's app.config (APP_CONFIG, TENANT_CONFIGS, ...)
+    """
+    import yaml
+
+    with open(config_file_path, "rt") as config_file:
+        config_data = yaml.safe_load(config_file)
 
     # update relative paths if needed
     config_data_weather = config_data["APP_CONFIG"]["weather"]
@@ -27,36 +56,306 @@ with open(config_file_path, "rt") as config_file:
             app_dir / config_data_events["key_file"]
         ).resolve()
 
+    # compile the saved-places matcher once, before any request needs it
+    get_location_matcher(config_data_events)
+
+    # households served by this process under /households/<tenant>, if any
+    config_data["TENANT_CONFIGS"] = {
+        tenant: build_tenant_config(config_data["APP_CONFIG"], tenant, overrides)
+        for tenant, overrides in (config_data.get("TENANTS") or {}).items()
+    }
+
+    return config_data
+
+
+def build_tenant_config(app_config: dict, tenant: str, overrides: dict) -> dict:
+    """Derive one household's APP_CONFIG from the shared APP_CONFIG.
+    Each section of overrides (weather, events, ...) is merged one level deep
+    over the shared section, so tables such as event_calendars are replaced
+    whole. Unless overridden, cache files are namespaced under
+    tenants/<tenant>/ next to the shared ones, while the OpenWeather call
+    budget stays shared.
 
-class Config:
-    pass
+    Args:
+        tenant (str): Name of the household, used in its URLs
+        overrides (dict): Settings from TENANTS[tenant] in config.yaml
 
+    Returns:
+        dict: APP_CONFIG for the household
+    """
+    overrides = overrides or {}
+    tenant_config = dict(app_config)
+    for section, section_overrides in overrides.items():
+        tenant_config[section] = {
+            **(app_config.get(section) or {}),
+            **(section_overrides or {}),
+        }
 
-# apply base config from config file
-if config_data is not None:
-    for k, v in config_data.items():
-        setattr(Config, k, v)
+    for section in ["weather", "events"]:
+        section_config = tenant_config[section] = dict(tenant_config[section])
+        section_overrides = overrides.get(section) or {}
+        shared_cache_file = Path(app_config[section]["cache_file"])
+        for path_key in ["cache_file", "key_file"]:
+            if path_key in section_overrides and section_config.get(
+                f"{path_key}_relative"
+            ):
+                section_config[path_key] = (
+                    app_dir / section_overrides[path_key]
+                ).resolve()
+        if "cache_file" not in section_overrides:
+            section_config["cache_file"] = (
+                shared_cache_file.parent / "tenants" / tenant / shared_cache_file.name
+            )
+        Path(section_config["cache_file"]).parent.mkdir(parents=True, exist_ok=True)
+
+    tenant_config["weather"].setdefault(
+        "rate_limit_file",
+        Path(app_config["weather"]["cache_file"]).parent / "openweather.budget",
+    )
+    get_location_matcher(tenant_config["events"])
+
+    return tenant_config
 
 
 # set up logging
-def configure_logging(app):
-    """Configure logging based on flask object debug mode"""
-    log_file_path = app_dir / "logs/app.log"
-    if not log_file_path.exists():
-        log_file_path.touch()
-
-    if app.debug:  # log to terminal AND file
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[logging.FileHandler(log_file_path), logging.StreamHandler()],
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# queue drained by this process's log writer, or by the gunicorn master's
+# writer when set by share_log_queue before workers are forked
+log_queue = None
+
+
+class LogPipe(multiprocessing.queues.SimpleQueue):
+    """Queue from the workers to the gunicorn master's log writer.
+    Unlike multiprocessing.Queue, records are written straight to the pipe
+    rather than by a feeder thread, so logging keeps working in workers forked
+    after the master has logged (as with preload_app).
+    """
+
+    def __init__(self):
+        super().__init__(ctx=multiprocessing.get_context())
+        # records dropped by this process because the pipe was full
+        self.dropped = 0
+        self._capacity = 64 * 1024
+        if hasattr(fcntl, "F_GETPIPE_SZ"):
+            self._capacity = fcntl.fcntl(self._writer.fileno(), fcntl.F_GETPIPE_SZ)
+        os.set_blocking(self._writer.fileno(), False)
+
+    def _pending(self) -> int:
+        """Return the bytes written to the pipe and not read yet."""
+        pending = array.array("i", [0])
+        fcntl.ioctl(self._writer.fileno(), termios.FIONREAD, pending)
+        return pending[0]
+
+    def put_nowait(self, item):
+        """Write a record if the pipe has room for it right now, else drop it.
+        Never blocks: a stalled writer costs log records, not requests.
+        Records up to PIPE_BUF are written in one atomic write or not at all;
+        longer ones (tracebacks) only into an empty pipe, where they fit whole.
+        The write lock is only waited on briefly in case a worker died holding it.
+        """
+        data = multiprocessing.reduction.ForkingPickler.dumps(item)
+        if self._wlock.acquire(timeout=0.1):
+            try:
+                # 4 bytes of length header go out in the same write
+                if len(data) + 4 <= select.PIPE_BUF or (
+                    len(data) <= self._capacity // 2 and self._pending() == 0
+                ):
+                    self._writer.send_bytes(data)
+                    return
+            except BlockingIOError:
+                pass
+            finally:
+                self._wlock.release()
+
+        self.dropped += 1
+        from .metrics import LOG_RECORDS_DROPPED
+
+        LOG_RECORDS_DROPPED.inc()
+
+    def get(self, block: bool = True):
+        # QueueListener.dequeue passes block; the writer's OS thread just waits
+        return super().get()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, LOG_DATEFMT),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass only one in every `rate` records logged with extra={"sampled": True}."""
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._count = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return next(self._count) % self.rate == 0
+
+
+class RedactApiKeyFilter(logging.Filter):
+    """Mask the OpenWeather API key in logged request URLs, e.g. urllib3's
+    retry warnings and the errors requests raises for failed calls.
+    """
+
+    pattern = re.compile(r"(appid=)[^&\s'\"]+")
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if "appid=" in message:
+            record.msg = self.pattern.sub(r"\1***", message)
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text and "appid=" in record.exc_text:
+            record.exc_text = self.pattern.sub(r"\1***", record.exc_text)
+        return True
+
+
+def log_settings() -> dict:
+    """Return the optional LOGGING section of config.yaml."""
+    return load_config().get("LOGGING") or {}
+
+
+def build_log_handlers(log_config: dict, debug: bool = False) -> list[logging.Handler]:
+    """Create the handlers owned by the log writer: a rotating log file
+    (by size, or by time with rotation: time) plus the terminal in debug mode.
+    """
+    log_file_path = Path(log_config.get("file", app_dir / "logs/app.log"))
+    log_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if log_config.get("rotation", "size") == "time":
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            log_file_path,
+            when=log_config.get("when", "midnight"),
+            backupCount=log_config.get("backup_count", 7),
         )
-    else:  # log to file for prod
-        logging.basicConfig(
-            filename=log_file_path,
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file_path,
+            maxBytes=log_config.get("max_bytes", 10 * 1024 * 1024),
+            backupCount=log_config.get("backup_count", 5),
         )
+
+    if log_config.get("format", "json") == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
+    file_handler.setFormatter(formatter)
+
+    handlers = [file_handler]
+    if debug:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(stream_handler)
+    return handlers
+
+
+class LogListener(logging.handlers.QueueListener):
+    """QueueListener whose writer always runs on an OS thread.
+    In a gevent-patched gunicorn master a threading.Thread is a greenlet, so
+    the writer's blocking read from the pipe would stall the whole master, and
+    workers forked from it would inherit the greenlet. Started from the
+    original _thread functions, the writer blocks only itself and is not
+    carried into forked workers.
+    """
+
+    def start(self):
+        start_new_thread = _thread.start_new_thread
+        allocate_lock = _thread.allocate_lock
+        if "gevent.monkey" in sys.modules:
+            from gevent import monkey
+
+            start_new_thread, allocate_lock = monkey.get_original(
+                "_thread", ["start_new_thread", "allocate_lock"]
+            )
+
+        # held until the writer returns, so stop() can wait on it
+        done = allocate_lock()
+        done.acquire()
+
+        def run():
+            try:
+                self._monitor()
+            finally:
+                done.release()
+
+        start_new_thread(run, ())
+        self._thread = done
+
+    def stop(self):
+        if self._thread:
+            self.enqueue_sentinel()
+            self._thread.acquire()
+            self._thread = None
+
+
+def start_log_listener(log_queue, handlers: list[logging.Handler]):
+    """Start the single writer draining log_queue into handlers.
+    Stopped at exit, but only by the process that started it: workers forked
+    from the gunicorn master inherit the exit handler, and stopping would put
+    the stop sentinel on the shared pipe and shut down the master's writer.
+    """
+    listener = LogListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    owner = os.getpid()
+
+    def stop():
+        if os.getpid() == owner:
+            listener.stop()
+
+    atexit.register(stop)
+    return listener
+
+
+def share_log_queue():
+    """Start a log writer in this process for workers forked from it.
+    Called from the gunicorn master so all workers append to the log file
+    through one writer, which keeps rotation safe.
+    """
+    global log_queue
+    log_queue = LogPipe()
+    return start_log_listener(log_queue, build_log_handlers(log_settings()))
+
+
+def configure_logging(app):
+    """Configure logging based on flask object debug mode.
+    Request threads only enqueue records; a listener thread (or the gunicorn
+    master, see share_log_queue) does the formatting and disk writes.
+    """
+    global log_queue
+    log_config = app.config.get("LOGGING") or {}
+
+    if log_queue is None:
+        log_queue = queue.SimpleQueue()
+        start_log_listener(log_queue, build_log_handlers(log_config, app.debug))
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # records cross to the writer pre-rendered; the writer's formatter adds the rest
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler.addFilter(
+        SamplingFilter(log_config.get("cache_hit_sample_rate", 100))
+    )
+    queue_handler.addFilter(RedactApiKeyFilter())
+    logging.basicConfig(
+        level=logging.DEBUG if app.debug else logging.INFO,
+        handlers=[queue_handler],
+    )
     logger = logging.getLogger(__name__)
     logger.info("Config loaded")
@@ -1,81 +1,125 @@
-import json
+import bisect
 import logging
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
 from zoneinfo import ZoneInfo
-from urllib.parse import urlencode
 import time
 
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-from pydantic import ValidationError
-
-from . import models
+from . import cache, calendar_sync, clients, models
+from .locations import get_location_matcher
+from .metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
 
 logger = logging.getLogger(__name__)
 
 
 def call_api_events(
-    calendar_id: str, start_dt: datetime, end_dt: datetime, service
+    calendar_id: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    service,
+    http=None,
+    page_size: int = 250,
 ) -> list[dict]:
     """Call Google Calendar API and return events for given calendar and date range.
+    Follows nextPageToken so busy calendars are returned in full.
 
     Args:
         calendar_id (str): Google's ID of the calendar
         start_dt (datetime): start date to filter calendar events by
         end_dt (datetime): end date to filter calendar events by
+        http (AuthorizedHttp, optional): transport to use instead of the service's own
+        page_size (int): events requested per page (Google allows up to 2500)
 
     Returns:
         list[dict]: list of calendar events returned for given calendar and date range
     """
 
     logger.info(f"Calling Google Calendar API for events from '{calendar_id}'")
-    events_result = (
-        service.events()
-        .list(
-            calendarId=calendar_id,
-            timeMin=start_dt.isoformat(),
-            timeMax=end_dt.isoformat(),
-            singleEvents=True,
-            orderBy="startTime",
-            maxResults=10,
-        )
-        .execute()
-    )
-    events = events_result.get("items", [])
+    events = []
+    for page in calendar_sync.iter_pages(
+        service,
+        http,
+        calendarId=calendar_id,
+        timeMin=start_dt.isoformat(),
+        timeMax=end_dt.isoformat(),
+        singleEvents=True,
+        orderBy="startTime",
+        maxResults=page_size,
+    ):
+        events.extend(page.get("items", []))
     logger.info(f"    Received {len(events)} events from Google Calendar API")
 
     return events
 
 
-def create_directions_url(config: dict, location: str | None) -> str | None:
-    """Convert event location (if any) into a directions url.
-    For in-person events, this will be a Google Maps URL with the event location as the destination.
-    For virtual events, this will be the event URL.
-    For events without a location, this will be None.
+def fetch_calendars(
+    config: dict,
+    calendar_ids: list[str],
+    start_dt: datetime,
+    end_dt: datetime,
+) -> dict[str, list[dict]]:
+    """Fetch events for several calendars concurrently.
+    Each fetch checks out its own pooled http transport (httplib2 is not
+    thread-safe) bounded by calendar_timeout; at most calendar_concurrency
+    calendars are fetched at once.
+    With incremental_sync enabled, calendars are synced into the local event
+    store with sync tokens instead of being listed in full.
+    The whole run, including any refresh of the service account token, goes
+    through the google_calendar circuit breaker as one call, so a half-open
+    probe is a whole refresh and an auth outage opens the circuit too.
 
     Args:
-        location (str | None): Location of event
+        calendar_ids (list[str]): Google IDs of the calendars to fetch
+        start_dt (datetime): start date to filter calendar events by
+        end_dt (datetime): end date to filter calendar events by
 
     Returns:
-        str | None: URL to Google Maps directions or event URL
+        dict[str, list[dict]]: Calendar events keyed by calendar ID
     """
-    if location is not None:
-        # virtual event
-        if "https://" in location:
-            return location
-
-        # in-person event
-        if location != config["direction_origin"]:
-            url_query = urlencode(
-                {
-                    "api": config["google_maps_api_version"],
-                    "origin": config["direction_origin"],
-                    "destination": location,
-                }
+    breaker = clients.get_breaker("google_calendar", config)
+    # fail fast while the circuit is open, before loading the sync store
+    breaker.allow()
+
+    incremental = config.get("incremental_sync", False)
+    store = calendar_sync.load_store(config) if incremental else None
+
+    def fetch(calendar_id: str) -> list[dict]:
+        start = time.perf_counter()
+        try:
+            with clients.calendar_http(config) as http:
+                if incremental:
+                    return calendar_sync.sync_events(
+                        config, store, calendar_id, start_dt, service, http=http
+                    )
+                return call_api_events(
+                    calendar_id,
+                    start_dt,
+                    end_dt,
+                    service,
+                    http=http,
+                    page_size=config.get("page_size", 250),
+                )
+        except Exception:
+            UPSTREAM_ERRORS.labels("google_calendar", calendar_id).inc()
+            raise
+        finally:
+            UPSTREAM_DURATION.labels("google_calendar", calendar_id).observe(
+                time.perf_counter() - start
             )
-            dir_url = f"{config['google_maps_base_url']}/?{url_query}"
 
-            return dir_url
+    unique_ids = list(dict.fromkeys(calendar_ids))
+    with breaker.call():
+        service = clients.get_calendar_service(config)
+        with ThreadPoolExecutor(
+            max_workers=config.get("calendar_concurrency", 4)
+        ) as executor:
+            futures = {cal_id: executor.submit(fetch, cal_id) for cal_id in unique_ids}
+            calendar_events = {cal_id: f.result() for cal_id, f in futures.items()}
+
+    if incremental:
+        calendar_sync.save_store(config, store)
+
+    return calendar_events
 
 
 def sort_events(events: list[models.Event]) -> list[models.Event]:
@@ -91,125 +135,119 @@ def sort_events(events: list[models.Event]) -> list[models.Event]:
     return sorted(events, key=lambda x: (not x.full_day, x.start, x.summary))
 
 
+def day_boundaries(config: dict) -> list[datetime]:
+    """Return the midnights delimiting the num_days days shown, starting today.
+
+    Returns:
+        list[datetime]: num_days + 1 midnights in the configured timezone
+    """
+    timezone = ZoneInfo(config["timezone"])
+    today = datetime.now(timezone).date()
+    return [
+        datetime.combine(today + timedelta(days=i), dt_time(), timezone)
+        for i in range(config.get("num_days", 2) + 1)
+    ]
+
+
+def parse_event_time(event_time: dict, timezone: ZoneInfo) -> datetime:
+    """Parse the start or end of an API event.
+    Full day events give a date, taken as midnight in the configured timezone.
+    """
+    if "dateTime" in event_time:
+        return datetime.fromisoformat(event_time["dateTime"])
+    return datetime.combine(date.fromisoformat(event_time["date"]), dt_time(), timezone)
+
+
+def day_span(boundaries: list[datetime], start: datetime, end: datetime) -> range:
+    """Return the indices of the days that an event from start to end overlaps.
+    Two binary searches over the day boundaries, so O(log num_days) per event.
+
+    Args:
+        boundaries (list[datetime]): Midnights from day_boundaries
+        start (datetime): Start of the event
+        end (datetime): End of the event (exclusive)
+
+    Returns:
+        range: Indices into the window's days; empty if outside the window
+    """
+    # zero-length events still belong to the day they happen on
+    end = max(end, start + timedelta(seconds=1))
+    first = max(bisect.bisect_right(boundaries, start) - 1, 0)
+    last = min(bisect.bisect_left(boundaries, end), len(boundaries) - 1)
+    return range(first, last)
+
+
 def update_events_cache(config: dict) -> models.EventsCache:
     """Update local event cache for multiple Google calendars.
-    Captures events for today and tomorrow.
-    Saves events in local json and returns pydantic model.
+    Captures events for the next num_days days (default 2: today and tomorrow).
+    Events are listed on every day they overlap; full day events span whole days.
+    Saves events to the cache store (see cache_backend) and returns pydantic model.
 
     Returns:
         models.EventsCache: Pydantic model of events
     """
-    credentials = service_account.Credentials.from_service_account_file(
-        config["key_file"], scopes=["https://www.googleapis.com/auth/calendar.readonly"]
+    matcher = get_location_matcher(config)
+    timezone = ZoneInfo(config["timezone"])
+
+    boundaries = day_boundaries(config)
+    days = [models.EventsDay(day=midnight.date()) for midnight in boundaries[:-1]]
+
+    calendar_events = fetch_calendars(
+        config,
+        [cal_info["id"] for cal_info in config["event_calendars"].values()]
+        + [config["food_calendar"]["id"]],
+        boundaries[0],
+        boundaries[-1],
     )
-    service = build("calendar", "v3", credentials=credentials)
-
-    today_midnight = (
-        datetime.today()
-        .astimezone(ZoneInfo(config["timezone"]))
-        .replace(hour=0, minute=0, second=0)
-    )
-    tomorrow_midnight = today_midnight + timedelta(days=1)
-    two_days_midnight = today_midnight + timedelta(days=2)
-
-    events_today = []
-    events_tomorrow = []
-    meals_today = []
-    meals_tomorrow = []
 
     for cal_name, cal_info in config["event_calendars"].items():
-        events = call_api_events(
-            cal_info["id"], today_midnight, two_days_midnight, service
-        )
+        events = calendar_events[cal_info["id"]]
 
         for e in events:
-            if "date" in e["start"]:  # full day event
-                e_model = models.Event(
-                    calendar=cal_name,
-                    summary=e["summary"],
-                    full_day=True,
-                    start=datetime.fromisoformat(e["start"]["date"]).astimezone(
-                        ZoneInfo(config["timezone"])
-                    ),
-                    end=datetime.fromisoformat(e["end"]["date"]).astimezone(
-                        ZoneInfo(config["timezone"])
-                    ),
-                    location=e.get("location"),
-                    directions=create_directions_url(config, e.get("location")),
-                )
-                if e_model.start <= today_midnight < e_model.end:
-                    events_today.append(e_model)
-                if e_model.start <= tomorrow_midnight < e_model.end:
-                    events_tomorrow.append(e_model)
-
-            elif "dateTime" in e["start"]:  # timed event
-                e_model = models.Event(
-                    calendar=cal_name,
-                    summary=e["summary"],
-                    start=datetime.fromisoformat(e["start"]["dateTime"]),
-                    end=datetime.fromisoformat(e["end"]["dateTime"]),
-                    location=e.get("location"),
-                    directions=create_directions_url(config, e.get("location")),
-                )
-                if today_midnight <= e_model.start < tomorrow_midnight:
-                    events_today.append(e_model)
-                if tomorrow_midnight <= e_model.start < two_days_midnight:
-                    events_tomorrow.append(e_model)
+            if "date" not in e["start"] and "dateTime" not in e["start"]:
+                continue
+            e_model = models.Event(
+                calendar=cal_name,
+                summary=e["summary"],
+                full_day="date" in e["start"],
+                start=parse_event_time(e["start"], timezone),
+                end=parse_event_time(e["end"], timezone),
+                location=e.get("location"),
+                directions=matcher.directions(e.get("location")),
+            )
+            for i in day_span(boundaries, e_model.start, e_model.end):
+                days[i].events.append(e_model)
 
-    food_events = call_api_events(
-        config["food_calendar"]["id"], today_midnight, two_days_midnight, service
-    )
+    food_events = calendar_events[config["food_calendar"]["id"]]
 
     for f in food_events:
         if "date" in f["start"]:  # full day "event"
             f_model = models.Food(
                 summary=f["summary"],
-                start=datetime.fromisoformat(f["start"]["date"]).astimezone(
-                    ZoneInfo(config["timezone"])
-                ),
-                end=datetime.fromisoformat(f["end"]["date"]).astimezone(
-                    ZoneInfo(config["timezone"])
-                ),
+                start=parse_event_time(f["start"], timezone),
+                end=parse_event_time(f["end"], timezone),
             )
-            if f_model.start <= today_midnight < f_model.end:
-                meals_today.append(f_model)
-            if f_model.start <= tomorrow_midnight < f_model.end:
-                meals_tomorrow.append(f_model)
-
-    events_cache = models.EventsCache(
-        timestamp=int(time.time()),
-        events_today=sort_events(events_today),
-        meals_today=meals_today,
-        events_tomorrow=sort_events(events_tomorrow),
-        meals_tomorrow=meals_tomorrow,
-    )
+            for i in day_span(boundaries, f_model.start, f_model.end):
+                days[i].meals.append(f_model)
+
+    for day in days:
+        day.events = sort_events(day.events)
 
-    with open(config["cache_file"], "wt") as cache_file:
-        cache_file.write(events_cache.model_dump_json(indent=4))
+    events_cache = models.EventsCache(timestamp=int(time.time()), days=days)
+
+    cache.write_cache(config, events_cache)
 
     return events_cache
 
 
 def get_cached_events(config: dict) -> models.EventsCache:
     """Get cached events if available. Else refresh cache and return results.
+    Concurrent refreshes are coalesced so upstream is called once per expiry.
 
     Returns:
         models.EventsCache: Pydantic model of events
     """
-    try:
-        with open(config["cache_file"], "rt") as cache_file:
-            cache_data = models.EventsCache(**json.load(cache_file))
-    except (ValidationError, FileNotFoundError, json.decoder.JSONDecodeError) as e:
-        logger.error(e)
-        return update_events_cache(config)
-
-    cache_expiration_timestamp = cache_data.timestamp + config["cache_ttl"]
-    if time.time() < cache_expiration_timestamp:
-        logger.info("Using fresh cache.")
-        return cache_data
-    else:
-        logger.info("Cache expired. Refreshing cache.")
-        return update_events_cache(config)
+    return cache.get_cached(config, models.EventsCache, update_events_cache)
 
 
 def format_events(config: dict, events_cache_dict: dict) -> dict:
@@ -221,32 +259,55 @@ def format_events(config: dict, events_cache_dict: dict) -> dict:
     Returns:
         dict: Formated events cache
     """
-    for event_day in ["events_today", "events_tomorrow"]:
-        for e in events_cache_dict[event_day]:
+    matcher = get_location_matcher(config)
+    for day in events_cache_dict["days"]:
+        for e in day["events"]:
             e["start"] = e["start"].strftime("%H:%M")
             e["end"] = e["end"].strftime("%H:%M")
-
-            if e["location"] is not None:
-                for root_address, friendly_name in config["common_locations"].items():
-                    if root_address.lower() in e["location"].lower():
-                        e["location"] = friendly_name
-                        break
+            e["location"] = matcher.display_name(e["location"])
 
     return events_cache_dict
 
 
-def get_events(config: dict) -> dict:
-    """Returns events data to be used in jinja template; relies on cache
+def day_name(day: date, today: date) -> str:
+    """Name a day for headings: today, tomorrow, else weekday and date."""
+    offset = (day - today).days
+    if offset == 0:
+        return "today"
+    if offset == 1:
+        return "tomorrow"
+    return day.strftime("%A %m-%d")
+
+
+def build_events_view(config: dict, events_cache: models.EventsCache) -> dict:
+    """Convert events cache into data for the jinja template.
+
+    Args:
+        events_cache (models.EventsCache): Pydantic model of events
 
     Returns:
-        dict: Events data for today and tomorrow
+        dict: Events data for each day of the window
     """
-    events_cache = get_cached_events(config)
     events_cache_dict = events_cache.model_dump()
     events_cache_dict["last_updated"] = events_cache.formatted_timestamp(
         config["timezone"]
     )
 
+    today = datetime.now(ZoneInfo(config["timezone"])).date()
+    for day in events_cache_dict["days"]:
+        day["name"] = day_name(day["day"], today)
+
     events_cache_dict = format_events(config, events_cache_dict)
 
     return events_cache_dict
+
+
+def get_events(config: dict) -> dict:
+    """Returns events data to be used in jinja template; relies on cache
+
+    Returns:
+        dict: Events data for each day of the window
+    """
+    events_cache = get_cached_events(config)
+    view = cache.cached_view(config, events_cache, build_events_view)
+    return cache.degraded_view(config, events_cache, view)
@@ -0,0 +1,108 @@
+import re
+import threading
+from functools import lru_cache
+from urllib.parse import urlencode
+
+_lock = threading.Lock()
+_matchers: dict[tuple, "LocationMatcher"] = {}
+
+
+class LocationMatcher:
+    """Resolves event locations to a friendly name and directions URL.
+    All common_locations are compiled into one case-insensitive pattern; the
+    lookahead reports at every offset the earliest-listed saved place starting
+    there, so the result matches a scan of common_locations in config order
+    while the text is walked only once. Results are memoized per location.
+    """
+
+    def __init__(self, config: dict, maxsize: int = 4096):
+        self.config = config
+        self.friendly_names = list(config["common_locations"].values())
+        alternatives = "|".join(
+            f"({re.escape(root_address)})"
+            for root_address in config["common_locations"]
+        )
+        self.pattern = (
+            re.compile(f"(?=(?:{alternatives}))", re.IGNORECASE)
+            if self.friendly_names
+            else None
+        )
+        self.resolve = lru_cache(maxsize=maxsize)(self._resolve)
+
+    def friendly_name(self, location: str) -> str:
+        """Return the name of the first common location found in location,
+        or location unchanged.
+        """
+        if self.pattern is None:
+            return location
+
+        matched = [m.lastindex for m in self.pattern.finditer(location)]
+        if not matched:
+            return location
+        return self.friendly_names[min(matched) - 1]
+
+    def _resolve(self, location: str | None) -> tuple[str | None, str | None]:
+        if location is None:
+            return None, None
+        return self.friendly_name(location), create_directions_url(
+            self.config, location
+        )
+
+    def directions(self, location: str | None) -> str | None:
+        return self.resolve(location)[1]
+
+    def display_name(self, location: str | None) -> str | None:
+        return self.resolve(location)[0]
+
+
+def create_directions_url(config: dict, location: str | None) -> str | None:
+    """Convert event location (if any) into a directions url.
+    For in-person events, this will be a Google Maps URL with the event location as the destination.
+    For virtual events, this will be the event URL.
+    For events without a location, this will be None.
+
+    Args:
+        location (str | None): Location of event
+
+    Returns:
+        str | None: URL to Google Maps directions or event URL
+    """
+    if location is not None:
+        # virtual event
+        if "https://" in location:
+            return location
+
+        # in-person event
+        if location != config["direction_origin"]:
+            url_query = urlencode(
+                {
+                    "api": config["google_maps_api_version"],
+                    "origin": config["direction_origin"],
+                    "destination": location,
+                }
+            )
+            dir_url = f"{config['google_maps_base_url']}/?{url_query}"
+
+            return dir_url
+
+
+def get_location_matcher(config: dict) -> LocationMatcher:
+    """Return the process-wide matcher for the events config, compiling it on
+    first use (config load warms it) and again only if the saved places or
+    directions settings change.
+
+    Returns:
+        LocationMatcher: Matcher for config["common_locations"]
+    """
+    matcher_key = (
+        tuple(config["common_locations"].items()),
+        config["direction_origin"],
+        config["google_maps_api_version"],
+        config["google_maps_base_url"],
+    )
+    with _lock:
+        matcher = _matchers.get(matcher_key)
+        if matcher is None:
+            matcher = LocationMatcher(config)
+            _matchers[matcher_key] = matcher
+    return matcher
@@ -0,0 +1,98 @@
+import os
+import time
+
+from flask import Flask, g, request
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    "panel_request_duration_seconds",
+    "Time to produce a response, by route",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CACHE_EVENTS = Counter(
+    "panel_cache_events_total",
+    "Cache lookups and refreshes, by cache and result "
+    "(hit, miss, stale, expired, refresh, coalesced, degraded)",
+    ["cache", "result"],
+)
+UPSTREAM_DURATION = Histogram(
+    "panel_upstream_duration_seconds",
+    "Duration of upstream API calls, by upstream and endpoint or calendar",
+    ["upstream", "target"],
+)
+UPSTREAM_ERRORS = Counter(
+    "panel_upstream_errors_total",
+    "Failed upstream API calls, by upstream and endpoint or calendar",
+    ["upstream", "target"],
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "panel_log_records_dropped_total",
+    "Log records dropped because the pipe to the log writer was full",
+)
+
+
+class CacheAgeCollector:
+    """Reports cache age at scrape time, read from the caches all workers share."""
+
+    def __init__(self, timestamps: dict[str, int | None]):
+        self.timestamps = timestamps
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "panel_cache_age_seconds",
+            "Seconds since each cache was last refreshed",
+            labels=["cache"],
+        )
+        now = time.time()
+        for name, timestamp in self.timestamps.items():
+            if timestamp is not None:
+                gauge.add_metric([name], now - timestamp)
+        yield gauge
+
+
+def render(cache_timestamps: dict[str, int | None]) -> bytes:
+    """Render all metrics in the Prometheus text format.
+    Under gunicorn with PROMETHEUS_MULTIPROC_DIR set, counters and histograms
+    are aggregated across every worker rather than only the one scraped.
+
+    Args:
+        cache_timestamps (dict): Current timestamp of each cache, None if missing
+
+    Returns:
+        bytes: Exposition text
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    age_registry = CollectorRegistry()
+    age_registry.register(CacheAgeCollector(cache_timestamps))
+
+    return generate_latest(registry) + generate_latest(age_registry)
+
+
+def init_metrics(app: Flask):
+    """Time every request into REQUEST_LATENCY, labelled by url rule."""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_latency(response):
+        if "request_start" in g:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUEST_LATENCY.labels(route).observe(time.perf_counter() - g.request_start)
+        return response
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel
@@ -53,12 +53,15 @@ class Food(BaseModel):
     end: datetime
 
 
+class EventsDay(BaseModel):
+    day: date
+    events: list[Event] = []
+    meals: list[Food] = []
+
+
 class EventsCache(BaseModel):
     timestamp: int
-    events_today: list[Event]
-    meals_today: list[Food] = []
-    events_tomorrow: list[Event]
-    meals_tomorrow: list[Food] = []
+    days: list[EventsDay]
 
     def formatted_timestamp(self, timezone: str) -> str:
         """Convert timestamp into human-readable string"""
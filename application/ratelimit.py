@@ -0,0 +1,71 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+from .singleflight import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class RateBudgetExceeded(Exception):
+    """Raised when no upstream call fits in the budget within the allowed wait."""
+
+
+class RateBudget:
+    """Token bucket allowing `rate` calls per `period` seconds, in bursts of up
+    to `rate`. The bucket lives in a small state file guarded by a file lock,
+    so every gunicorn worker draws from the same budget.
+    """
+
+    def __init__(self, path: Path, rate: int, period: float = 60):
+        self.path = Path(path)
+        self.lock_path = f"{self.path}.lock"
+        self.rate = rate
+        self.period = period
+
+    def _take(self) -> float:
+        """Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, else seconds until one is available
+        """
+        now = time.time()
+        try:
+            state = json.loads(self.path.read_text())
+            tokens = min(
+                self.rate,
+                state["tokens"] + (now - state["updated"]) * self.rate / self.period,
+            )
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+            tokens = self.rate
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) * self.period / self.rate
+        self.path.write_text(json.dumps({"tokens": tokens, "updated": now}))
+        return wait
+
+    def acquire(self, max_wait: float):
+        """Wait for a token, for at most max_wait seconds.
+
+        Args:
+            max_wait (float): Longest time to wait for the budget to refill
+
+        Raises:
+            RateBudgetExceeded: If no token becomes available in time
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            with file_lock(self.lock_path):
+                wait = self._take()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateBudgetExceeded(
+                    f"Rate budget of {self.rate} calls per {self.period}s exhausted"
+                )
+            logger.info(f"Rate budget exhausted, waiting {wait:.1f}s")
+            time.sleep(wait)
@@ -1,10 +1,152 @@
-from flask import Blueprint, render_template, current_app
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from .weather import get_weather, WEATHER_EMOJI_MAP
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    render_template,
+    current_app,
+    g,
+    make_response,
+    request,
+)
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from . import cache, metrics
+from .broadcast import Broadcaster, format_sse
+from .weather import (
+    get_weather,
+    default_location,
+    location_configs,
+    WEATHER_EMOJI_MAP,
+)
 from .events import get_events
 
 main_bp = Blueprint("main", __name__)
 
+# rendered widget fragments keyed by tenant and widget: (cache timestamp, html, etag)
+_fragments = cache.LRUCache(maxsize=256)
+
+# one broadcaster per tenant (None for the shared config)
+_broadcasters: dict[str | None, Broadcaster] = {}
+_broadcasters_lock = threading.Lock()
+
+
+@main_bp.url_value_preprocessor
+def pull_tenant(endpoint: str | None, values: dict | None):
+    """Take the tenant out of /households/<tenant>/... URLs; 404 if unknown."""
+    g.tenant = values.pop("tenant", None) if values else None
+    tenant_config(g.tenant)
+
+
+@main_bp.url_defaults
+def add_tenant(endpoint: str, values: dict):
+    """Keep url_for inside the current household."""
+    if g.get("tenant") and current_app.url_map.is_endpoint_expecting(
+        endpoint, "tenant"
+    ):
+        values.setdefault("tenant", g.tenant)
+
+
+def tenant_config(tenant: str | None = None) -> dict:
+    """Return the APP_CONFIG of a household (shared config if None); 404 if unknown."""
+    if tenant is None:
+        return current_app.config["APP_CONFIG"]
+    try:
+        return current_app.config["TENANT_CONFIGS"][tenant]
+    except KeyError:
+        abort(404)
+
+
+def render_fragment(
+    widget: str, timestamp: int, template: str, **context
+) -> tuple[int, str, str]:
+    """Render a widget template once per cache timestamp and reuse the html."""
+    fragment = _fragments.get(widget)
+    if fragment is None or fragment[0] != timestamp:
+        html = render_template(template, **context)
+        etag = hashlib.sha1(html.encode()).hexdigest()
+        fragment = _fragments[widget] = (timestamp, html, etag)
+    return fragment
+
+
+def weather_config(location: str | None = None, tenant: str | None = None) -> dict:
+    """Return the config of a weather location (default location if None); 404 if unknown."""
+    config = tenant_config(tenant)["weather"]
+    if location is None:
+        location = default_location(config)
+    try:
+        return location_configs(config)[location]
+    except KeyError:
+        abort(404)
+
+
+def weather_fragment(
+    weather_dict: dict | None = None,
+    oob: bool = False,
+    location: str | None = None,
+    tenant: str | None = None,
+) -> tuple[int, str, str]:
+    """Render the weather widget; oob marks it for an htmx out-of-band swap."""
+    if weather_dict is None:
+        weather_dict = get_weather(weather_config(location, tenant))
+    widget = "weather" if location is None else f"weather:{location}"
+    if weather_dict.get("stale"):
+        widget = f"{widget}:stale"
+    return render_fragment(
+        f"{tenant}/{widget}_oob" if oob else f"{tenant}/{widget}",
+        weather_dict["timestamp"],
+        "weather.html",
+        weather=weather_dict,
+        weather_emoji_map=WEATHER_EMOJI_MAP,
+        oob=oob,
+    )
+
+
+def events_fragment(
+    events_dict: dict | None = None, oob: bool = False, tenant: str | None = None
+) -> tuple[int, str, str]:
+    """Render the events widget; oob marks it for an htmx out-of-band swap."""
+    events_config = tenant_config(tenant)["events"]
+    if events_dict is None:
+        events_dict = get_events(events_config)
+    widget = "events:stale" if events_dict.get("stale") else "events"
+    return render_fragment(
+        f"{tenant}/{widget}_oob" if oob else f"{tenant}/{widget}",
+        events_dict["timestamp"],
+        "events.html",
+        events=events_dict,
+        events_config=events_config,
+        oob=oob,
+    )
+
+
+def get_broadcaster(tenant: str | None = None) -> Broadcaster:
+    """Return the broadcaster pushing a household's widgets, creating it on first use."""
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.get(tenant)
+        if broadcaster is None:
+            broadcaster = _broadcasters[tenant] = Broadcaster(
+                {
+                    "weather": lambda: weather_fragment(tenant=tenant),
+                    "events": lambda: events_fragment(tenant=tenant),
+                }
+            )
+    return broadcaster
+
+
+def conditional_response(fragment: tuple[int, str, str]):
+    """Serve a rendered fragment with validators; 304 if the client has it."""
+    timestamp, html, etag = fragment
+    response = make_response(html)
+    response.set_etag(etag)
+    response.last_modified = timestamp
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 
 @main_bp.route("/")
 def home():
@@ -16,11 +158,17 @@ def home():
 @main_bp.route("/weather")
 def weather():
     try:
-        weather_dict = get_weather(current_app.config["APP_CONFIG"]["weather"])
-        return render_template(
-            "weather.html",
-            weather=weather_dict,
-            weather_emoji_map=WEATHER_EMOJI_MAP,
+        return conditional_response(weather_fragment(tenant=g.tenant))
+    except Exception:
+        return render_template("weather_error.html")
+
+
+@main_bp.route("/weather/<location>")
+def location_weather(location: str):
+    weather_config(location, g.tenant)  # 404 before rendering for unknown locations
+    try:
+        return conditional_response(
+            weather_fragment(location=location, tenant=g.tenant)
         )
     except Exception:
         return render_template("weather_error.html")
@@ -29,10 +177,81 @@ def weather():
 @main_bp.route("/events")
 def events():
     try:
-        events_dict = get_events(current_app.config["APP_CONFIG"]["events"])
-        return render_template(
-            "events.html",
-            events=events_dict,
-        )
+        return conditional_response(events_fragment(tenant=g.tenant))
     except Exception:
         return render_template("events_error.html")
+
+
+@main_bp.route("/dashboard")
+def dashboard():
+    """Render both widgets in one response as htmx out-of-band swaps.
+    The two cache lookups run concurrently.
+    """
+    app_config = tenant_config(g.tenant)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        weather_future = executor.submit(get_weather, weather_config(tenant=g.tenant))
+        events_future = executor.submit(get_events, app_config["events"])
+
+    parts = []
+    for future, render, error_template in (
+        (weather_future, weather_fragment, "weather_error.html"),
+        (events_future, events_fragment, "events_error.html"),
+    ):
+        try:
+            parts.append(render(future.result(), oob=True, tenant=g.tenant))
+        except Exception:
+            parts.append((None, render_template(error_template, oob=True), None))
+
+    html = "".join(part[1] for part in parts)
+    if any(part[0] is None for part in parts):
+        return html
+
+    etag = hashlib.sha1("".join(part[2] for part in parts).encode()).hexdigest()
+    return conditional_response((max(part[0] for part in parts), html, etag))
+
+
+def metrics_endpoint():
+    """Serve every household's metrics; registered on the app in create_app,
+    outside the per-household blueprint.
+    """
+    app_configs = {None: current_app.config["APP_CONFIG"]}
+    app_configs.update(current_app.config["TENANT_CONFIGS"])
+    caches = []
+    for tenant, app_config in app_configs.items():
+        prefix = f"{tenant}/" if tenant else ""
+        caches.append((f"{prefix}events", app_config["events"]))
+        locations = location_configs(app_config["weather"])
+        for location, config in locations.items():
+            name = "weather" if len(locations) == 1 else f"weather:{location}"
+            caches.append((f"{prefix}{name}", config))
+
+    timestamps = {name: cache.read_timestamp(config) for name, config in caches}
+
+    return Response(metrics.render(timestamps), mimetype=CONTENT_TYPE_LATEST)
+
+
+@main_bp.route("/stream")
+def stream():
+    """Push updated widget fragments to the panel as server-sent events."""
+    broadcaster = get_broadcaster(g.tenant)
+    stream_config = tenant_config(g.tenant).get("stream") or {}
+    subscriber = broadcaster.subscribe(current_app._get_current_object(), stream_config)
+    keepalive = stream_config.get("keepalive", 15)
+
+    def event_stream():
+        try:
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(
+        event_stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
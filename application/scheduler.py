@@ -0,0 +1,198 @@
+import fcntl
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from pydantic import BaseModel
+
+from . import cache, events, models, weather
+
+logger = logging.getLogger(__name__)
+
+app_dir = Path(__file__).parent
+
+
+class RefreshJob:
+    """Periodic refresh of one widget cache, timed off the cache's own timestamp."""
+
+    def __init__(
+        self,
+        name: str,
+        config: dict,
+        model: type[BaseModel],
+        update: Callable[[dict], BaseModel],
+        scheduler_config: dict,
+    ):
+        self.name = name
+        self.config = config
+        self.model = model
+        self.update = update
+        self.interval = config.get("refresh_interval", config["cache_ttl"])
+        self.lead_time = scheduler_config.get("lead_time", 30)
+        self.jitter = scheduler_config.get("jitter", 10)
+        self.retry_delay = scheduler_config.get("retry_delay", 15)
+        self.max_backoff = scheduler_config.get("max_backoff", 600)
+        self.failures = 0
+        self.next_run = 0.0
+
+    def run(self):
+        """Refresh the cache unless it outlives the lead time, then schedule the next run."""
+        try:
+            cache_data = cache.refresh_cache(
+                self.config,
+                self.model,
+                self.update,
+                margin=self.lead_time + self.jitter,
+            )
+        except Exception as e:
+            self.failures += 1
+            delay = min(self.max_backoff, self.retry_delay * 2 ** (self.failures - 1))
+            logger.error(
+                f"Scheduled {self.name} refresh failed, retrying in {delay}s: {e}"
+            )
+            self.next_run = time.time() + delay
+            return
+
+        self.failures = 0
+        self.next_run = max(
+            time.time() + 1,
+            cache_data.timestamp
+            + self.interval
+            - self.lead_time
+            - random.uniform(0, self.jitter),
+        )
+        logger.info(
+            f"Next scheduled {self.name} refresh at {time.ctime(self.next_run)}"
+        )
+
+
+class Scheduler:
+    """Pre-warms widget caches ahead of expiry from a single elected worker.
+
+    Every gunicorn worker starts a scheduler thread, but only the worker holding
+    the leader file lock runs jobs. If the leader exits, the OS releases its lock
+    and another worker takes over on its next election attempt.
+    """
+
+    def __init__(
+        self,
+        jobs: list[RefreshJob],
+        lock_path: Path,
+        election_interval: int,
+        concurrency: int = 4,
+    ):
+        self.jobs = jobs
+        self.lock_path = lock_path
+        self.election_interval = election_interval
+        self.concurrency = concurrency
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _try_become_leader(self) -> bool:
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info("Elected refresh scheduler leader")
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self._lock_file is None and not self._try_become_leader():
+                self._stop.wait(self.election_interval)
+                continue
+
+            now = time.time()
+            due = [job for job in self.jobs if job.next_run <= now]
+            if not due:
+                self._stop.wait(min(job.next_run for job in self.jobs) - now)
+                continue
+            if len(due) == 1:
+                due[0].run()
+            else:
+                # e.g. several locations or tenants expiring together
+                with ThreadPoolExecutor(
+                    max_workers=min(len(due), self.concurrency)
+                ) as executor:
+                    for job in due:
+                        executor.submit(job.run)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._loop, name="refresh-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def refresh_jobs(
+    app_config: dict, scheduler_config: dict, prefix: str = ""
+) -> list[RefreshJob]:
+    """Create a refresh job per weather location plus one for events."""
+    locations = weather.location_configs(app_config["weather"])
+    jobs = [
+        RefreshJob(
+            prefix + ("weather" if len(locations) == 1 else f"weather:{location}"),
+            location_config,
+            models.WeatherCache,
+            weather.update_weather_cache,
+            scheduler_config,
+        )
+        for location, location_config in locations.items()
+    ]
+    jobs.append(
+        RefreshJob(
+            f"{prefix}events",
+            app_config["events"],
+            models.EventsCache,
+            events.update_events_cache,
+            scheduler_config,
+        )
+    )
+    return jobs
+
+
+def init_scheduler(
+    app_config: dict, tenant_configs: dict[str, dict] | None = None
+) -> Scheduler | None:
+    """Start the refresh scheduler if enabled under APP_CONFIG["scheduler"].
+    One scheduler refreshes the shared caches and those of every tenant.
+
+    Returns:
+        Scheduler | None: Running scheduler, or None when disabled
+    """
+    scheduler_config = app_config.get("scheduler") or {}
+    if not scheduler_config.get("enabled", False):
+        return None
+
+    jobs = refresh_jobs(app_config, scheduler_config)
+    for tenant, tenant_config in (tenant_configs or {}).items():
+        jobs += refresh_jobs(tenant_config, scheduler_config, prefix=f"{tenant}/")
+    scheduler = Scheduler(
+        jobs,
+        lock_path=Path(scheduler_config.get("lock_file", app_dir / "scheduler.lock")),
+        election_interval=scheduler_config.get("election_interval", 30),
+        concurrency=scheduler_config.get("concurrency", 4),
+    )
+    if os.environ.get("GUNICORN_PRELOAD_APP", "false").lower() == "true":
+        # created in the gunicorn master: threads don't survive the fork, and a
+        # leader lock taken here would be inherited by every worker
+        os.register_at_fork(after_in_child=scheduler.start)
+    else:
+        scheduler.start()
+
+    return scheduler
@@ -0,0 +1,80 @@
+import functools
+import hashlib
+import json
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+CacheModel = TypeVar("CacheModel", bound=BaseModel)
+
+
+class IncompatibleCache(ValueError):
+    """Raised when an entry was written for another model or schema version."""
+
+
+@functools.cache
+def schema_version(model: type[BaseModel]) -> str:
+    """Return a short hash of the model's JSON schema; changes with its fields."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha1(schema.encode()).hexdigest()[:8]
+
+
+def schema_tag(model: type[BaseModel]) -> str:
+    return f"{model.__name__}/{schema_version(model)}"
+
+
+def dumps(cache_data: BaseModel) -> str:
+    """Serialize a cache model as a header line, then compact JSON:
+
+        WeatherCache/3f2a9c1d 1746662400
+        {"timestamp":1746662400,"current":{...},"forecast":[...]}
+
+    The header names the model and its schema version, so entries written by
+    an incompatible version of the code are spotted without validating the
+    payload, and carries the timestamp so a file entry's age is known without
+    parsing it.
+
+    Args:
+        cache_data (BaseModel): Cache model with a timestamp field
+
+    Returns:
+        str: Header line followed by the model as compact JSON
+    """
+    return (
+        f"{schema_tag(type(cache_data))} {cache_data.timestamp}\n"
+        f"{cache_data.model_dump_json()}"
+    )
+
+
+def parse_header(header: str) -> tuple[str, int]:
+    """Return the schema tag and timestamp of a header line.
+
+    Raises:
+        IncompatibleCache: If the line is not a cache header
+    """
+    try:
+        tag, timestamp = header.split()
+        return tag, int(timestamp)
+    except ValueError:
+        raise IncompatibleCache(f"Not a cache header: {header[:40]!r}") from None
+
+
+def loads(data: str, model: type[CacheModel]) -> CacheModel:
+    """Check the header and validate the payload straight from JSON.
+
+    Args:
+        data (str): Serialized entry written by dumps
+        model (type[CacheModel]): Pydantic model the entry should hold
+
+    Returns:
+        CacheModel: Validated cache model
+
+    Raises:
+        IncompatibleCache: If the entry holds another model or schema version
+        ValidationError: If the payload does not match the model
+    """
+    header, _, payload = data.partition("\n")
+    tag, _ = parse_header(header)
+    if tag != schema_tag(model):
+        raise IncompatibleCache(f"Cache holds {tag}, expected {schema_tag(model)}")
+    return model.model_validate_json(payload)
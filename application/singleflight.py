@@ -0,0 +1,152 @@
+import fcntl
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """A refresh in flight; followers wait on the event for the leader's result."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Hold an exclusive advisory lock on lock_path across processes.
+
+    Args:
+        lock_path (str): Path of the lock file; created if missing
+    """
+    with open(lock_path, "a") as lock_file:
+        # poll instead of blocking in flock so gevent workers keep serving
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SingleFlight:
+    """Coalesce concurrent refreshes of the same key into one upstream call.
+
+    Within a process, callers for a key already in flight wait for the running
+    call and share its result. Across gunicorn workers, the leader holds a file
+    lock while refreshing; a worker that had to wait for the lock re-checks the
+    cache first and reuses the other worker's result if it is now fresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self._counters: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"leader": 0, "coalesced": 0}
+        )
+
+    def _count(self, key: str, kind: str, callback: Callable[[], None] | None = None):
+        with self._lock:
+            self._counters[key][kind] += 1
+        if callback is not None:
+            callback()
+
+    def in_flight(self, key: str) -> bool:
+        """Return True if a refresh for key is running in this process."""
+        with self._lock:
+            return key in self._calls
+
+    def do(
+        self,
+        key: str,
+        lock_path: str,
+        fn: Callable[[], Any],
+        recheck: Callable[[], Any | None],
+        on_coalesced: Callable[[], None] | None = None,
+    ) -> Any:
+        """Run fn once for all concurrent callers of key.
+
+        Args:
+            key (str): Identity of the refresh (e.g. cache file path)
+            lock_path (str): File used to serialize the refresh across processes
+            fn (Callable): Performs the refresh and returns its result
+            recheck (Callable): Returns a fresh result if one already exists, else None
+            on_coalesced (Callable, optional): Called whenever a caller shares
+                another refresh's result instead of running fn, e.g. to count it
+
+        Returns:
+            Any: Result of fn, or of recheck if another process refreshed first
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count(key, "coalesced", on_coalesced)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with file_lock(lock_path):
+                result = recheck()
+                if result is not None:
+                    self._count(key, "coalesced", on_coalesced)
+                    logger.info(f"Reusing cache refreshed by another worker: {key}")
+                else:
+                    self._count(key, "leader")
+                    result = fn()
+            call.result = result
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_in_background(
+        self,
+        key: str,
+        lock_path: str,
+        fn: Callable[[], Any],
+        recheck: Callable[[], Any | None],
+        on_coalesced: Callable[[], None] | None = None,
+    ):
+        """Start do() in a daemon thread unless key is already in flight.
+        Errors are logged rather than raised since no caller waits on the result.
+        """
+        if self.in_flight(key):
+            return
+
+        def run():
+            try:
+                self.do(key, lock_path, fn, recheck, on_coalesced)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {key}: {e}")
+
+        threading.Thread(target=run, name=f"refresh:{key}", daemon=True).start()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return leader/coalesced counts per key for this process."""
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._counters.items()}
+
+
+refresh_group = SingleFlight()
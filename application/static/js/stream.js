@@ -0,0 +1,15 @@
+// Swap widget fragments pushed by /stream into the panel.
+// EventSource reconnects on its own if the connection drops.
+(function () {
+  // the page passes its household's stream url, e.g. /households/smith/stream
+  const source = new EventSource(document.currentScript.dataset.streamUrl);
+
+  for (const widget of ["weather", "events"]) {
+    source.addEventListener(widget, function (event) {
+      const target = document.getElementById(widget);
+      if (target) {
+        htmx.swap(target, event.data, { swapStyle: "outerHTML" });
+      }
+    });
+  }
+})();
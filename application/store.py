@@ -0,0 +1,247 @@
+import abc
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .serialization import parse_header
+
+
+def atomic_write(path, data: str):
+    """Write data so readers see either the old or the new file, never a partial one.
+    Writes to a temp file in the same directory, fsyncs it and renames it over path.
+
+    Args:
+        path (str | Path): Destination file
+        data (str): Text to write
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wt") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class CacheStore(abc.ABC):
+    """Where one cache entry is persisted.
+
+    Readers call version() on every lookup and only read() and deserialize
+    the entry when the version differs from the one held in memory.
+    """
+
+    key: str
+
+    @abc.abstractmethod
+    def version(self) -> tuple:
+        """Return a token that changes whenever the entry is rewritten.
+
+        Raises:
+            FileNotFoundError: If the entry has never been written
+        """
+
+    @abc.abstractmethod
+    def timestamp(self) -> int:
+        """Return the timestamp of the stored data without deserializing it.
+
+        Raises:
+            FileNotFoundError: If the entry has never been written
+        """
+
+    @abc.abstractmethod
+    def read(self) -> str:
+        """Return the stored text.
+
+        Raises:
+            FileNotFoundError: If the entry has never been written
+        """
+
+    @abc.abstractmethod
+    def write(self, data: str, timestamp: int):
+        """Replace the entry so readers see either the old or the new text.
+
+        Args:
+            data (str): Serialized entry
+            timestamp (int): Timestamp of the serialized data
+        """
+
+    @abc.abstractmethod
+    def delete(self):
+        """Remove the entry; does nothing if it was never written."""
+
+
+class FileStore(CacheStore):
+    """Cache entry persisted as a single file, replaced atomically on write."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.key = str(path)
+
+    def version(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def timestamp(self) -> int:
+        # the header line carries the timestamp, so the payload isn't read
+        with open(self.path, "rt") as cache_file:
+            return parse_header(cache_file.readline())[1]
+
+    def read(self) -> str:
+        with open(self.path, "rt") as cache_file:
+            return cache_file.read()
+
+    def write(self, data: str, timestamp: int):
+        atomic_write(self.path, data)
+
+    def delete(self):
+        self.path.unlink(missing_ok=True)
+
+
+class SQLiteStore(CacheStore):
+    """Cache entry kept as rows of a shared SQLite database in WAL mode.
+
+    Every write adds a row with the next version number, so readers in any
+    worker see either the previous or the new row and never block on the
+    writer. The newest `history` rows of each entry are kept; older ones are
+    pruned on write. Version and timestamp are columns, so checking freshness
+    never touches the payload.
+    """
+
+    # one connection per database and process, shared by every thread (and
+    # greenlet) in turn: db path -> (pid, inode, connection, lock)
+    _connections: dict[str, tuple[int, int, sqlite3.Connection, threading.Lock]] = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, db_path, name: str, history: int = 24):
+        self.db_path = str(db_path)
+        self.name = name
+        self.key = f"sqlite:{self.db_path}:{name}"
+        self.history = max(1, history)
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.db_path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # on every new connection, so a database removed at runtime is recreated
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                name TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (name, version)
+            )
+            """)
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        """Use this process's connection to the database, one caller at a time.
+        Reopened after a fork (connections can't cross one) and when the
+        database file was removed or replaced.
+        """
+        with self._connections_lock:
+            try:
+                inode = os.stat(self.db_path).st_ino
+            except FileNotFoundError:
+                inode = None
+
+            entry = self._connections.get(self.db_path)
+            if entry is None or entry[:2] != (os.getpid(), inode):
+                if entry is not None and entry[0] == os.getpid():
+                    # wait for the caller still using it
+                    with entry[3]:
+                        entry[2].close()
+                connection = self._open()
+                entry = self._connections[self.db_path] = (
+                    os.getpid(),
+                    os.stat(self.db_path).st_ino,
+                    connection,
+                    threading.Lock(),
+                )
+
+        with entry[3]:
+            yield entry[2]
+
+    def _latest(self, column: str):
+        with self._connection() as connection:
+            row = connection.execute(
+                f"SELECT {column} FROM cache_entries WHERE name = ? "
+                "ORDER BY version DESC LIMIT 1",
+                (self.name,),
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No cache entry {self.name} in {self.db_path}")
+        return row[0]
+
+    def version(self) -> tuple:
+        return (self._latest("version"),)
+
+    def timestamp(self) -> int:
+        return self._latest("timestamp")
+
+    def read(self) -> str:
+        return self._latest("data")
+
+    def write(self, data: str, timestamp: int):
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                (version,) = connection.execute(
+                    "SELECT COALESCE(MAX(version), 0) + 1 FROM cache_entries "
+                    "WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+                connection.execute(
+                    "INSERT INTO cache_entries (name, version, timestamp, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.name, version, timestamp, data),
+                )
+                connection.execute(
+                    "DELETE FROM cache_entries WHERE name = ? AND version <= ?",
+                    (self.name, version - self.history),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def delete(self):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM cache_entries WHERE name = ?", (self.name,))
+
+
+def get_store(config: dict) -> CacheStore:
+    """Return the store holding the cache entry configured by cache_file.
+    With cache_backend "sqlite" (the default), the entry is named after
+    cache_file and kept in cache_db, by default cache.db next to cache_file;
+    with "file", cache_file itself holds the entry.
+    """
+    backend = config.get("cache_backend", "sqlite")
+    if backend == "file":
+        return FileStore(config["cache_file"])
+    if backend == "sqlite":
+        cache_file = Path(config["cache_file"])
+        return SQLiteStore(
+            config.get("cache_db") or cache_file.parent / "cache.db",
+            str(cache_file),
+            history=config.get("cache_history", 24),
+        )
+    raise ValueError(f"Unknown cache_backend: {backend}")
@@ -1,13 +1,15 @@
-import json
+import hashlib
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from zoneinfo import ZoneInfo
 
-import requests
-from pydantic import ValidationError
-
-from . import models
+from . import cache, clients, models
+from .metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from .singleflight import refresh_group
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,98 @@ WEATHER_EMOJI_MAP = {
     "50n": "\U0001f327",
 }
 
+DEFAULT_LOCATION = "default"
+
+# seconds taken by the most recent call to each OpenWeather endpoint
+last_call_timings: dict[str, float] = {}
+
+_lock = threading.Lock()
+# per-location configs derived from a weather config, keyed by its id
+_location_configs: dict[int, tuple[dict, dict[str, dict]]] = {}
+# location configs by coordinates key, then by cache file
+_coordinate_groups: dict[str, dict[str, dict]] = {}
+
+
+def coordinates_key(config: dict) -> str:
+    """Identify the upstream data a location needs; equal keys mean equal data."""
+    return (
+        f"{config['base_url']}|{float(config['lat']):.4f},{float(config['lon']):.4f}"
+        f"|{config['units']}|{config['num_days']}"
+    )
+
+
+def location_configs(config: dict) -> dict[str, dict]:
+    """Return the weather config of each named location.
+    Locations listed under `locations` (name -> lat, lon and any overrides)
+    share the remaining settings and each get their own cache file, e.g.
+    weather.json -> weather.cabin.json. Without `locations`, the config itself
+    is the single location "default".
+
+    Returns:
+        dict[str, dict]: Weather config by location name
+    """
+    entry = _location_configs.get(id(config))
+    if entry is not None and entry[0] is config:
+        return entry[1]
+
+    locations = config.get("locations")
+    if not locations:
+        configs = {DEFAULT_LOCATION: config}
+    else:
+        shared = {k: v for k, v in config.items() if k != "locations"}
+        cache_file = Path(config["cache_file"])
+        configs = {
+            name: {
+                **shared,
+                **(overrides or {}),
+                "location": name,
+                "cache_file": cache_file.with_name(
+                    f"{cache_file.stem}.{name}{cache_file.suffix}"
+                ),
+            }
+            for name, overrides in locations.items()
+        }
+
+    with _lock:
+        _location_configs[id(config)] = (config, configs)
+        for location_config in configs.values():
+            _coordinate_groups.setdefault(coordinates_key(location_config), {})[
+                str(location_config["cache_file"])
+            ] = location_config
+
+    return configs
+
+
+def default_location(config: dict) -> str:
+    """Return the location served by /weather: default_location, else the first."""
+    return config.get("default_location") or next(iter(location_configs(config)))
+
+
+def get_json(config: dict, endpoint: str, url: str):
+    """GET url through the shared OpenWeather session and record its duration.
+
+    Args:
+        endpoint (str): Name of the endpoint, used to label the timing
+
+    Returns:
+        JSON response from API as python object
+    """
+    start = time.perf_counter()
+    try:
+        response = clients.get_weather_session(config).get(
+            url, timeout=clients.weather_timeout(config)
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        UPSTREAM_ERRORS.labels("openweather", endpoint).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        last_call_timings[endpoint] = elapsed
+        UPSTREAM_DURATION.labels("openweather", endpoint).observe(elapsed)
+        logger.info(f"OpenWeather {endpoint} call took {elapsed:.3f}s")
+
 
 def call_api_current_weather(config: dict) -> dict:
     """Call OpenWeather API and return current weather data.
@@ -40,9 +134,7 @@ def call_api_current_weather(config: dict) -> dict:
         dict: JSON response from API as python dict
     """
     url = f"{config['base_url']}/weather?lat={config['lat']}&lon={config['lon']}&appid={config['api_key']}&units={config['units']}"
-    response = requests.get(url)
-    response.raise_for_status()
-    current_weather = response.json()
+    current_weather = get_json(config, "weather", url)
 
     return current_weather
 
@@ -54,9 +146,7 @@ def call_api_forecast_weather(config: dict) -> list:
         dict: JSON response from API as python dict
     """
     url = f"{config['base_url']}/forecast?lat={config['lat']}&lon={config['lon']}&appid={config['api_key']}&units={config['units']}&cnt={config['num_days'] * 8}"
-    response = requests.get(url)
-    response.raise_for_status()
-    forecast_weather = response.json()["list"]
+    forecast_weather = get_json(config, "forecast", url)["list"]
 
     return forecast_weather
 
@@ -149,62 +239,107 @@ def timestamp_to_date_hour(timestamp: int, timezone: str) -> str:
     )
 
 
-def update_weather_cache(config: dict) -> models.WeatherCache:
-    """Calls OpenWeather API and updates weather cache.
-    Cache is stored in local json file and returned as pydantic model.
+def fetch_weather(config: dict) -> models.WeatherCache:
+    """Call OpenWeather API for current and forecast weather concurrently.
+    Both calls draw on the rate budget first, then go through the openweather
+    circuit breaker as one call, so a half-open probe is a whole refresh.
 
     Returns:
         models.WeatherCache: Pydantic model of weather cache
     """
+    breaker = clients.get_breaker("openweather", config)
+    # fail fast while the circuit is open, before waiting on the rate budget
+    breaker.allow()
 
-    cw = call_api_current_weather(config)
-    current_weather_model = process_current_weather(cw)
+    budget = clients.get_weather_budget(config)
+    if budget is not None:
+        for _ in range(2):
+            budget.acquire(config.get("rate_limit_max_wait", 10))
+
+    with breaker.call(), ThreadPoolExecutor(max_workers=2) as executor:
+        cw_future = executor.submit(call_api_current_weather, config)
+        fw_future = executor.submit(call_api_forecast_weather, config)
+        cw = cw_future.result()
+        fw = fw_future.result()
 
-    fw = call_api_forecast_weather(config)
+    current_weather_model = process_current_weather(cw)
     forecast_weather_models = process_forecast_weather(fw)
 
-    weather_cache = models.WeatherCache(
+    return models.WeatherCache(
         timestamp=int(time.time()),
         current=current_weather_model,
         forecast=forecast_weather_models,
     )
 
-    with open(config["cache_file"], "wt") as cache_file:
-        json.dump(weather_cache.model_dump(), cache_file, indent=4)
+
+def update_weather_cache(config: dict) -> models.WeatherCache:
+    """Calls OpenWeather API and updates weather cache.
+    Locations with identical coordinates share one upstream fetch: concurrent
+    refreshes wait for a single call, and a location whose twin holds fresh
+    data newer than its own (refreshed by any worker) copies the twin's data
+    instead. Only newer data counts, so twins pre-warmed ahead of expiry by
+    the scheduler don't keep copying each other's soon-to-expire entries.
+    Cache is saved to the cache store (see cache_backend) and returned as
+    pydantic model.
+
+    Returns:
+        models.WeatherCache: Pydantic model of weather cache
+    """
+    key = coordinates_key(config)
+    cache_file = str(config["cache_file"])
+
+    def fresh_twin() -> models.WeatherCache | None:
+        own_timestamp = cache.read_timestamp(config) or 0
+        with _lock:
+            twins = [
+                twin_config
+                for twin_file, twin_config in _coordinate_groups.get(key, {}).items()
+                if twin_file != cache_file
+            ]
+        fresh = [
+            cache_data
+            for cache_data in (
+                cache.read_cache(twin_config, models.WeatherCache)
+                for twin_config in twins
+            )
+            if cache_data is not None
+            and cache_data.timestamp > own_timestamp
+            and cache.is_fresh(config, cache_data)
+        ]
+        return max(fresh, key=lambda c: c.timestamp, default=None)
+
+    lock_name = f"openweather-{hashlib.sha1(key.encode()).hexdigest()[:12]}.lock"
+    weather_cache = refresh_group.do(
+        f"openweather:{key}",
+        str(Path(cache_file).parent / lock_name),
+        lambda: fetch_weather(config),
+        fresh_twin,
+    )
+
+    cache.write_cache(config, weather_cache)
 
     return weather_cache
 
 
 def get_cached_weather(config: dict) -> models.WeatherCache:
     """Get cached weather if available. Else refresh cache and return results.
+    Concurrent refreshes are coalesced so upstream is called once per expiry.
 
     Returns:
         models.WeatherCache: Pydantic model of weather
     """
+    return cache.get_cached(config, models.WeatherCache, update_weather_cache)
 
-    try:
-        with open(config["cache_file"], "rt") as cache_file:
-            cache_data = models.WeatherCache(**json.load(cache_file))
-    except (ValidationError, FileNotFoundError, json.decoder.JSONDecodeError) as e:
-        logger.error(e)
-        return update_weather_cache(config)
-
-    cache_expiration_timestamp = cache_data.timestamp + config["cache_ttl"]
-    if time.time() < cache_expiration_timestamp:
-        logger.info("Using fresh cache.")
-        return cache_data
-    else:
-        logger.info("Cache expired. Refreshing cache.")
-        return update_weather_cache(config)
 
+def build_weather_view(config: dict, weather_cache: models.WeatherCache) -> dict:
+    """Convert weather cache into data for the jinja template.
 
-def get_weather(config: dict) -> dict:
-    """Returns weather data to be used in jinja template; relies on cache
+    Args:
+        weather_cache (models.WeatherCache): Pydantic model of weather
 
     Returns:
         dict: Weather data
     """
-    weather_cache = get_cached_weather(config)
     weather_cache_dict = weather_cache.model_dump()
     weather_cache_dict["last_updated"] = weather_cache.formatted_timestamp(
         config["timezone"]
@@ -214,3 +349,14 @@ def get_weather(config: dict) -> dict:
         f["timestamp"] = timestamp_to_date_hour(f["timestamp"], config["timezone"])
 
     return weather_cache_dict
+
+
+def get_weather(config: dict) -> dict:
+    """Returns weather data to be used in jinja template; relies on cache
+
+    Returns:
+        dict: Weather data
+    """
+    weather_cache = get_cached_weather(config)
+    view = cache.cached_view(config, weather_cache, build_weather_view)
+    return cache.degraded_view(config, weather_cache, view)
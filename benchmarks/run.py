@@ -0,0 +1,297 @@
+"""Benchmarks for the request and refresh hot paths.
+
+Usage:
+    python -m benchmarks.run [--output results.json] [--compare baseline.json]
+
+Runs against local stand-in OpenWeather and Google Calendar servers, so no
+network access or credentials are needed (the app's config.yaml must still
+exist since create_app() loads it). Results are written as JSON; with
+--compare, any benchmark whose p50 regressed by more than --threshold
+relative to the baseline makes the run exit non-zero.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+from zoneinfo import ZoneInfo
+
+from google.auth.credentials import AnonymousCredentials
+
+from application import (
+    cache,
+    clients,
+    create_app,
+    events,
+    models,
+    routes,
+    serialization,
+    store,
+    weather,
+)
+from application.cli import measure_boot
+
+from . import stubs
+
+TIMEZONE = "America/New_York"
+
+
+def summarize(samples: list[float]) -> dict:
+    """Summarize per-iteration durations (seconds) in milliseconds."""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "iterations": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "ops_per_sec": len(samples) / sum(samples),
+    }
+
+
+def measure(
+    fn: Callable[[], object], iterations: int, setup: Callable[[], object] = None
+) -> dict:
+    """Time fn over iterations; setup runs untimed before each call."""
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def make_configs(
+    cache_dir: Path, weather_url: str, calendar_url: str, calendars: int
+) -> dict:
+    return {
+        "weather": {
+            "base_url": f"{weather_url}/data/2.5",
+            "lat": 40.0,
+            "lon": -75.0,
+            "api_key": "benchmark",
+            "units": "metric",
+            "num_days": 1,
+            "timezone": TIMEZONE,
+            "cache_ttl": 600,
+            "cache_file": cache_dir / "weather.json",
+            # the stub has no call budget to protect
+            "rate_limit_per_minute": 0,
+        },
+        "events": {
+            "timezone": TIMEZONE,
+            "cache_ttl": 600,
+            "cache_file": cache_dir / "events.json",
+            "key_file": cache_dir / "key.json",
+            "calendar_api_endpoint": f"{calendar_url}/calendar/v3/",
+            "direction_origin": "1 Home Street",
+            "google_maps_api_version": 1,
+            "google_maps_base_url": "https://www.google.com/maps/dir",
+            "event_calendars": {
+                f"calendar-{i}": {"id": f"calendar-{i}@example.com", "color": "#888"}
+                for i in range(calendars)
+            },
+            "food_calendar": {"id": "food@example.com"},
+            "common_locations": {
+                f"{i} Saved Place Road": f"Place {i}" for i in range(200)
+            },
+        },
+    }
+
+
+def clear_memory():
+    cache._memory.clear()
+    routes._fragments.clear()
+
+
+def cold(config: dict) -> Callable[[], None]:
+    """Setup step that removes a cache entry so the next read must refresh."""
+
+    def setup():
+        store.get_store(config).delete()
+        clear_memory()
+
+    return setup
+
+
+def synthetic_events_dict(count: int, locations: list[str]) -> dict:
+    day = datetime(2025, 5, 8, tzinfo=ZoneInfo(TIMEZONE))
+    return {
+        "days": [
+            {
+                "day": day.date(),
+                "events": [
+                    {
+                        "calendar": "family",
+                        "summary": f"Event {i}",
+                        "full_day": False,
+                        "start": day + timedelta(minutes=i),
+                        "end": day + timedelta(minutes=i + 30),
+                        "location": f"{locations[i % len(locations)]}, Springfield",
+                        "directions": None,
+                    }
+                    for i in range(count)
+                ],
+                "meals": [],
+            },
+            {"day": (day + timedelta(days=1)).date(), "events": [], "meals": []},
+        ],
+    }
+
+
+def run(args) -> dict:
+    today_midnight = datetime.now(ZoneInfo(TIMEZONE)).replace(
+        hour=0, minute=0, second=0
+    )
+    locations = [f"{i} Saved Place Road" for i in range(200)]
+    weather_stub = stubs.openweather_server(args.latency)
+    calendar_stub = stubs.calendar_server(
+        args.latency, today_midnight, 20, locations[:20]
+    )
+    clients.get_credentials = lambda config: AnonymousCredentials()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app_config = make_configs(
+            Path(tmp), weather_stub.url, calendar_stub.url, args.calendars
+        )
+        weather_config = app_config["weather"]
+        events_config = app_config["events"]
+
+        app = create_app()
+        app.config.update({"TESTING": True, "APP_CONFIG": app_config})
+        client = app.test_client()
+
+        def get(path: str) -> Callable[[], None]:
+            def request():
+                response = client.get(path)
+                assert response.status_code == 200, response.status_code
+                assert b"something went wrong" not in response.data, path
+
+            return request
+
+        # request hot paths
+        for path in ["/weather", "/events", "/dashboard"]:
+            get(path)()
+            results[f"route{path.replace('/', '_')}_warm"] = measure(
+                get(path), args.iterations
+            )
+        results["route_weather_cold"] = measure(
+            get("/weather"), args.refresh_iterations, cold(weather_config)
+        )
+        results["route_events_cold"] = measure(
+            get("/events"), args.refresh_iterations, cold(events_config)
+        )
+
+        # refresh paths
+        results["update_weather_cache"] = measure(
+            lambda: weather.update_weather_cache(weather_config),
+            args.refresh_iterations,
+        )
+        results["update_events_cache"] = measure(
+            lambda: events.update_events_cache(events_config),
+            args.refresh_iterations,
+        )
+
+        # processing over large synthetic payloads
+        forecast = stubs.forecast_payload(10_000)["list"]
+        results["process_forecast_weather_10k"] = measure(
+            lambda: weather.process_forecast_weather(forecast), args.refresh_iterations
+        )
+        payloads = []
+        results["format_events_5k"] = measure(
+            lambda: events.format_events(events_config, payloads.pop()),
+            args.refresh_iterations,
+            lambda: payloads.append(synthetic_events_dict(5_000, locations)),
+        )
+
+        # cache entry (de)serialization, paid on every write and version change
+        events_cache = models.EventsCache(
+            timestamp=int(time.time()), **synthetic_events_dict(5_000, locations)
+        )
+        serialized = serialization.dumps(events_cache)
+        results["serialize_events_5k"] = measure(
+            lambda: serialization.dumps(events_cache), args.refresh_iterations
+        )
+        results["deserialize_events_5k"] = measure(
+            lambda: serialization.loads(serialized, models.EventsCache),
+            args.refresh_iterations,
+        )
+
+    weather_stub.close()
+    calendar_stub.close()
+
+    # cold start of a worker, each in a fresh interpreter
+    boots = [measure_boot() for _ in range(args.boot_iterations)]
+    results["boot_import"] = summarize([boot["import_s"] for boot in boots])
+    results["boot_create_app"] = summarize([boot["create_app_s"] for boot in boots])
+
+    return {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "upstream_latency_s": args.latency,
+            "calendars": args.calendars,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Return descriptions of benchmarks whose p50 regressed beyond threshold."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"]
+        print(f"{name:36} {base['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms")
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: p50 {ratio:.2f}x baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--refresh-iterations", type=int, default=20)
+    parser.add_argument("--boot-iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--calendars", type=int, default=7)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = run(args)
+    output = json.dumps(report, indent=4)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(
+            json.loads(args.compare.read_text()), report, args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Local stand-ins for the OpenWeather and Google Calendar APIs.
+
+Each server answers with canned payloads after an injected delay, so refresh
+benchmarks measure our own overhead plus a known upstream latency.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+def current_weather_payload() -> dict:
+    return {
+        "weather": [{"main": "Clouds", "description": "few clouds", "icon": "02d"}],
+        "main": {"temp": 21.4},
+        "wind": {"speed": 3.2, "deg": 210},
+        "clouds": {"all": 20},
+        "rain": {"1h": 0.4},
+    }
+
+
+def forecast_payload(count: int, start: int = 1746662400) -> dict:
+    return {
+        "list": [
+            {
+                "dt": start + i * 3 * 60 * 60,
+                "weather": [
+                    {"main": "Rain", "description": "light rain", "icon": "10d"}
+                ],
+                "main": {"temp": 15 + i % 10},
+                "pop": (i % 10) / 10,
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def calendar_payload(count: int, day: datetime, locations: list[str]) -> dict:
+    """Timed events spread across day and the following day."""
+    items = []
+    for i in range(count):
+        start = day + timedelta(minutes=30 * (i % 96))
+        items.append(
+            {
+                "id": f"event-{i}",
+                "status": "confirmed",
+                "summary": f"Event {i}",
+                "location": locations[i % len(locations)] if locations else None,
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+            }
+        )
+    return {"items": items}
+
+
+class StubServer:
+    """Threaded HTTP server in a background thread answering with handle(path)."""
+
+    def __init__(self, handle, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                body = json.dumps(handle(urlparse(self.path).path)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def openweather_server(latency: float, forecast_count: int = 8) -> StubServer:
+    def handle(path: str) -> dict:
+        if path.endswith("/forecast"):
+            return forecast_payload(forecast_count)
+        return current_weather_payload()
+
+    return StubServer(handle, latency)
+
+
+def calendar_server(
+    latency: float, day: datetime, events_per_calendar: int, locations: list[str]
+) -> StubServer:
+    payload = calendar_payload(events_per_calendar, day, locations)
+    return StubServer(lambda path: payload, latency)
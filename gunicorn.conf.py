@@ -0,0 +1,82 @@
+# Gunicorn settings, overridable through environment variables.
+#
+# GUNICORN_WORKER_CLASS selects the serving mode:
+#   gthread (default)  each worker serves GUNICORN_THREADS requests at once
+#   gevent             async mode; sockets are monkey-patched so upstream calls
+#                      to OpenWeather and Google yield instead of blocking, and a
+#                      worker holds up to GUNICORN_WORKER_CONNECTIONS connections
+#   sync               one request per worker (no /stream support)
+#
+# GUNICORN_PRELOAD_APP=true loads the app once in the master before forking, so
+# workers share its memory copy-on-write and boot without re-importing it.
+import atexit
+import gc
+import logging
+import os
+import shutil
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "50"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# seconds a worker may go silent before the master restarts it
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+
+# the app reads this too, to start its scheduler in each worker after the fork
+preload_app = os.environ.get("GUNICORN_PRELOAD_APP", "false").lower() == "true"
+
+if worker_class == "gevent":
+    # patch before the app (and its http clients) are imported
+    from gevent import monkey
+
+    monkey.patch_all()
+
+    def release_log_handlers():
+        # flush and close log handlers, then forget them: a handler freed later,
+        # during interpreter teardown, can no longer take logging's
+        # gevent-patched lock ("RuntimeError: greenlet is being finalized")
+        logging.shutdown()
+        logging._handlerList.clear()
+
+    # registered before the app starts its log writer, so it runs after
+    # the writer has stopped, in the master and in every worker
+    atexit.register(release_log_handlers)
+
+
+def prepare_master():
+    # with PROMETHEUS_MULTIPROC_DIR set, workers share metrics through files there
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+    # the master writes the app log; workers inherit its queue when forked
+    from application.config import share_log_queue
+
+    share_log_queue()
+
+
+if preload_app:
+    # the app is loaded before on_starting runs, so prepare while reading config
+    prepare_master()
+
+
+def on_starting(server):
+    if not preload_app:
+        prepare_master()
+
+
+def when_ready(server):
+    if preload_app:
+        # keep the preloaded objects out of gc so collections in the workers
+        # don't write to (and so copy) the shared pages
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,52 @@
+import gzip
+
+from flask import Flask, url_for
+
+from application.assets import build_assets, init_assets
+
+
+def make_static(tmp_path):
+    static_dir = tmp_path / "static"
+    (static_dir / "css").mkdir(parents=True)
+    (static_dir / "css/main.css").write_text("body { color: red; }" * 50)
+    (static_dir / "css/input.css").write_text("@import 'tailwindcss';")
+    return static_dir
+
+
+def test_build_assets_writes_hashed_precompressed_copies(tmp_path):
+    static_dir = make_static(tmp_path)
+
+    manifest = build_assets(static_dir)
+
+    assert list(manifest) == ["css/main.css"]
+    hashed = static_dir / manifest["css/main.css"]
+    assert hashed.name.startswith("main.") and hashed.suffix == ".css"
+    assert gzip.decompress(hashed.with_name(f"{hashed.name}.gz").read_bytes()) == (
+        hashed.read_bytes()
+    )
+    assert build_assets(static_dir) == manifest
+
+
+def test_hashed_assets_are_served_precompressed_and_immutable(tmp_path):
+    static_dir = make_static(tmp_path)
+    manifest = build_assets(static_dir)
+    app = Flask(__name__, static_folder=static_dir)
+    init_assets(app)
+
+    with app.test_request_context():
+        url = url_for("static", filename="css/main.css")
+    assert url == f"/static/{manifest['css/main.css']}"
+
+    response = app.test_client().get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding == "gzip"
+    assert response.mimetype == "text/css"
+    assert response.cache_control.immutable
+    assert gzip.decompress(response.data) == (static_dir / "css/main.css").read_bytes()
+
+    response = app.test_client().get(url)
+    assert response.content_encoding is None
+    assert response.data == (static_dir / "css/main.css").read_bytes()
+
+    response = app.test_client().get("/static/css/main.css")
+    assert not response.cache_control.immutable
+    response.close()
@@ -0,0 +1,51 @@
+import pytest
+
+from application.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def fail(breaker: CircuitBreaker):
+    with pytest.raises(RuntimeError):
+        with breaker.call():
+            raise RuntimeError("upstream down")
+
+
+def test_breaker_opens_at_failure_rate_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4)
+
+    for _ in range(2):
+        with breaker.call():
+            pass
+        fail(breaker)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    with pytest.raises(CircuitOpen):
+        with breaker.call():
+            pytest.fail("upstream called while the circuit is open")
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("test", slow_call_seconds=0.5, min_calls=2)
+
+    breaker.record(elapsed=1.0, ok=True)
+    assert breaker.state == CLOSED
+    breaker.record(elapsed=1.0, ok=True)
+
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_closes_or_reopens_circuit():
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0)
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    fail(breaker)  # the probe fails
+    assert breaker.state == OPEN
+
+    with breaker.call():
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpen):  # one probe at a time
+            with breaker.call():
+                pass
+    assert breaker.state == CLOSED
@@ -0,0 +1,65 @@
+import queue
+
+from flask import Flask
+
+from application.broadcast import Broadcaster, format_sse
+
+
+def test_format_sse_prefixes_every_line():
+    assert format_sse("weather", "<div>\n</div>") == (
+        "event: weather\ndata: <div>\ndata: </div>\n\n"
+    )
+
+
+def test_poll_publishes_only_changed_fragments():
+    fragments = {"weather": (1, "<div>old</div>", "etag-old")}
+    broadcaster = Broadcaster({"weather": lambda: fragments["weather"]})
+    subscriber = queue.Queue()
+    broadcaster._subscribers.add(subscriber)
+
+    broadcaster.poll()
+    assert subscriber.empty()
+
+    fragments["weather"] = (2, "<div>new</div>", "etag-new")
+    broadcaster.poll()
+    assert subscriber.get_nowait() == ("weather", "<div>new</div>")
+    broadcaster.poll()
+    assert subscriber.empty()
+
+    # a cache turning degraded keeps its timestamp but renders differently
+    fragments["weather"] = (2, "<div>new, stale since 10:00</div>", "etag-stale")
+    broadcaster.poll()
+    assert subscriber.get_nowait() == ("weather", "<div>new, stale since 10:00</div>")
+
+
+def test_poll_publishes_first_render_after_a_failure():
+    fragments = {"weather": RuntimeError("upstream down")}
+
+    def render():
+        if isinstance(fragments["weather"], Exception):
+            raise fragments["weather"]
+        return fragments["weather"]
+
+    broadcaster = Broadcaster({"weather": render})
+    subscriber = queue.Queue()
+    broadcaster._subscribers.add(subscriber)
+
+    broadcaster.poll()
+    assert subscriber.empty()
+
+    fragments["weather"] = (1, "<div>recovered</div>", "etag")
+    broadcaster.poll()
+    assert subscriber.get_nowait() == ("weather", "<div>recovered</div>")
+    broadcaster.poll()
+    assert subscriber.empty()
+
+
+def test_subscribe_uses_the_households_poll_interval():
+    app = Flask(__name__)
+    app.config["APP_CONFIG"] = {"stream": {"poll_interval": 30}}
+    broadcaster = Broadcaster({})
+
+    subscriber = broadcaster.subscribe(app, {"poll_interval": 0.5})
+    broadcaster.unsubscribe(subscriber)
+
+    assert broadcaster.poll_interval == 0.5
@@ -0,0 +1,136 @@
+import time
+
+from pydantic import BaseModel
+
+from application import cache
+from application.breaker import CircuitOpen
+from application.serialization import dumps
+
+
+class DummyCache(BaseModel):
+    timestamp: int
+
+
+def make_update(calls: list):
+    def update(config: dict) -> DummyCache:
+        calls.append(1)
+        data = DummyCache(timestamp=int(time.time()))
+        cache.write_cache(config, data)
+        return data
+
+    return update
+
+
+def write_cache(path, age: int):
+    with open(path, "wt") as cache_file:
+        cache_file.write(dumps(DummyCache(timestamp=int(time.time()) - age)))
+
+
+def test_fresh_cache_is_served_without_refresh(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+    }
+    write_cache(config["cache_file"], age=10)
+    calls = []
+
+    cache.get_cached(config, DummyCache, make_update(calls))
+
+    assert calls == []
+
+
+def test_stale_cache_is_served_and_refreshed_in_background(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+        "cache_hard_ttl": 600,
+    }
+    write_cache(config["cache_file"], age=120)
+    calls = []
+
+    cache_data = cache.get_cached(config, DummyCache, make_update(calls))
+
+    assert time.time() - cache_data.timestamp >= 120
+    for _ in range(50):
+        if calls:
+            break
+        time.sleep(0.01)
+    assert calls == [1]
+
+
+def test_cache_past_hard_ttl_blocks_on_refresh(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+        "cache_hard_ttl": 600,
+    }
+    write_cache(config["cache_file"], age=1200)
+    calls = []
+
+    cache_data = cache.get_cached(config, DummyCache, make_update(calls))
+
+    assert calls == [1]
+    assert time.time() - cache_data.timestamp < 60
+
+
+def test_memory_tier_reuses_model_until_file_changes(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+    }
+    write_cache(config["cache_file"], age=10)
+
+    first = cache.read_cache(config, DummyCache)
+    assert cache.read_cache(config, DummyCache) is first
+
+    write_cache(config["cache_file"], age=5)
+    assert cache.read_cache(config, DummyCache) is not first
+
+
+def test_write_cache_replaces_file_atomically(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+    }
+    write_cache(config["cache_file"], age=10)
+
+    cache.write_cache(config, DummyCache(timestamp=123))
+
+    assert cache.read_cache(config, DummyCache).timestamp == 123
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = cache.LRUCache(maxsize=2)
+    lru["a"] = 1
+    lru["b"] = 2
+    lru.get("a")
+    lru["c"] = 3
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert len(lru) == 2
+
+
+def test_cache_past_hard_ttl_is_served_while_circuit_is_open(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+        "cache_hard_ttl": 600,
+    }
+    write_cache(config["cache_file"], age=1200)
+
+    def update(config: dict) -> DummyCache:
+        raise CircuitOpen("Circuit for test is open")
+
+    cache_data = cache.get_cached(config, DummyCache, update)
+
+    assert time.time() - cache_data.timestamp >= 1200
+    assert cache.is_degraded(config, cache_data)
+    assert cache.degraded_view(config, cache_data, {})["stale"]
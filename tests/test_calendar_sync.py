@@ -0,0 +1,91 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from application import calendar_sync
+
+START_DT = datetime(2025, 5, 8, tzinfo=ZoneInfo("America/New_York"))
+
+
+class FakeService:
+    """Stands in for the Calendar service; replies are queued per request kind."""
+
+    def __init__(self, replies: list):
+        self.replies = replies
+        self.requests = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.requests.append(params)
+        return self
+
+    def execute(self, http=None):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def timed_event(event_id: str, day: int, status: str = "confirmed") -> dict:
+    return {
+        "id": event_id,
+        "status": status,
+        "summary": event_id,
+        "start": {"dateTime": f"2025-05-{day:02d}T10:00:00-04:00"},
+        "end": {"dateTime": f"2025-05-{day:02d}T11:00:00-04:00"},
+    }
+
+
+def test_incremental_sync_merges_changes_and_deletions():
+    store = {}
+    service = FakeService(
+        [
+            {"items": [timed_event("a", 8)], "nextPageToken": "p2"},
+            {"items": [timed_event("b", 9)], "nextSyncToken": "token-1"},
+            {
+                "items": [timed_event("a", 0, "cancelled"), timed_event("c", 9)],
+                "nextSyncToken": "token-2",
+            },
+        ]
+    )
+
+    calendar_sync.sync_events({}, store, "cal", START_DT, service)
+    events = calendar_sync.sync_events({}, store, "cal", START_DT, service)
+
+    assert sorted(e["id"] for e in events) == ["b", "c"]
+    assert service.requests[2]["syncToken"] == "token-1"
+    assert store["cal"]["sync_token"] == "token-2"
+
+
+def test_expired_sync_token_falls_back_to_full_sync():
+    store = {
+        "cal": {
+            "sync_token": "stale",
+            "full_sync_at": 9e12,
+            "events": {"old": timed_event("old", 9)},
+        }
+    }
+    gone = HttpError(httplib2.Response({"status": 410}), b"")
+    service = FakeService(
+        [gone, {"items": [timed_event("new", 9)], "nextSyncToken": "token"}]
+    )
+
+    events = calendar_sync.sync_events({}, store, "cal", START_DT, service)
+
+    assert [e["id"] for e in events] == ["new"]
+    assert "timeMin" in service.requests[1]
+
+
+def test_events_ended_before_start_are_dropped():
+    store = {}
+    service = FakeService(
+        [{"items": [timed_event("past", 7)], "nextSyncToken": "token"}]
+    )
+
+    events = calendar_sync.sync_events({}, store, "cal", START_DT, service)
+
+    assert events == []
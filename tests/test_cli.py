@@ -0,0 +1,11 @@
+import json
+
+
+def test_boot_report_times_import_and_create_app(app):
+    result = app.test_cli_runner().invoke(args=["boot-report", "--json", "--top", "3"])
+
+    report = json.loads(result.output)
+    assert report["import_s"] > 0
+    assert report["create_app_s"] > 0
+    assert len(report["modules"]) == 3
+    assert any(name.startswith("application") for name, _ in report["modules"])
@@ -0,0 +1,62 @@
+import threading
+
+from google.oauth2 import service_account
+
+from application import clients
+
+
+class SlowCredentials:
+    def __init__(self, refreshing: threading.Event, release: threading.Event):
+        self.valid = False
+        self.refreshing = refreshing
+        self.release = release
+
+    def refresh(self, request):
+        self.refreshing.set()
+        self.release.wait(5)
+        self.valid = True
+
+
+def test_slow_token_refresh_does_not_hold_up_other_clients(tmp_path, monkeypatch):
+    refreshing, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(
+        service_account.Credentials,
+        "from_service_account_file",
+        lambda key_file, scopes: SlowCredentials(refreshing, release),
+    )
+    monkeypatch.setattr(clients, "_credentials", {})
+    monkeypatch.setattr(clients, "_breakers", {})
+    config = {"key_file": tmp_path / "key.json"}
+
+    thread = threading.Thread(target=clients.get_credentials, args=(config,))
+    thread.start()
+    assert refreshing.wait(5)
+
+    acquired = clients._lock.acquire(timeout=1)
+    if acquired:
+        clients._lock.release()
+    assert clients.get_breaker("openweather", {}) is not None
+    release.set()
+    thread.join()
+
+    assert acquired
+    assert clients.get_credentials(config).valid
+
+
+def test_token_refresh_times_out_after_calendar_timeout(tmp_path, monkeypatch):
+    class Credentials:
+        valid = False
+
+        def refresh(self, request):
+            self.timeout = request.keywords["timeout"]
+            self.valid = True
+
+    monkeypatch.setattr(
+        service_account.Credentials,
+        "from_service_account_file",
+        lambda key_file, scopes: Credentials(),
+    )
+    monkeypatch.setattr(clients, "_credentials", {})
+    config = {"key_file": tmp_path / "key.json", "calendar_timeout": 3}
+
+    assert clients.get_credentials(config).timeout == 3
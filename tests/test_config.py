@@ -0,0 +1,183 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from application import config
+from application.config import (
+    JsonFormatter,
+    LogPipe,
+    RedactApiKeyFilter,
+    SamplingFilter,
+    load_config,
+)
+
+
+def make_record(message: str, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_filter_passes_one_in_rate_sampled_records():
+    sampling_filter = SamplingFilter(10)
+
+    passed = [
+        sampling_filter.filter(make_record("Using fresh cache.", sampled=True))
+        for _ in range(100)
+    ]
+
+    assert sum(passed) == 10
+    assert sampling_filter.filter(make_record("Cache expired."))
+
+
+def test_json_formatter_outputs_one_object_per_record():
+    entry = json.loads(JsonFormatter().format(make_record("Config loaded")))
+
+    assert entry["message"] == "Config loaded"
+    assert entry["level"] == "INFO"
+
+
+def test_api_key_is_redacted_from_messages_and_tracebacks():
+    url = "/data/2.5/weather?lat=40.0&lon=-75.0&appid=secret&units=metric"
+    record = logging.LogRecord(
+        "urllib3.connectionpool",
+        logging.WARNING,
+        __file__,
+        1,
+        "Retrying %s",
+        (url,),
+        None,
+    )
+    try:
+        raise ConnectionError(f"Max retries exceeded with url: {url}")
+    except ConnectionError:
+        record.exc_info = sys.exc_info()
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler.addFilter(RedactApiKeyFilter())
+
+    queue_handler.handle(record)
+
+    message = records.get().getMessage()
+    assert "secret" not in message
+    assert "appid=***&units=metric" in message
+    assert "ConnectionError" in message
+
+
+def test_log_pipe_round_trips_records():
+    log_pipe = LogPipe()
+    log_pipe.put_nowait("Config loaded")
+
+    assert log_pipe.get() == "Config loaded"
+
+
+def test_log_pipe_drops_records_instead_of_blocking_when_full():
+    log_pipe = LogPipe()
+
+    for i in range(200):
+        log_pipe.put_nowait(f"{i} " + "x" * 1024)
+
+    assert log_pipe.dropped > 0
+    received = [log_pipe.get() for _ in range(200 - log_pipe.dropped)]
+    assert received[0].startswith("0 ")
+    assert not log_pipe._poll()
+
+    # records longer than PIPE_BUF still go through an empty pipe
+    log_pipe.put_nowait("x" * 20_000)
+    assert log_pipe.get() == "x" * 20_000
+
+
+def test_load_config_reads_config_once():
+    assert load_config() is load_config()
+
+
+def test_forked_workers_exiting_keep_master_log_writer(tmp_path, monkeypatch):
+    log_file = tmp_path / "app.log"
+    exit_handlers = []
+    monkeypatch.setattr(config, "log_settings", lambda: {"file": log_file})
+    monkeypatch.setattr(config, "log_queue", None)
+    monkeypatch.setattr(config.atexit, "register", exit_handlers.append)
+    listener = config.share_log_queue()
+
+    logger = logging.getLogger("test_fork")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(config.log_queue))
+    try:
+        for worker in range(2):
+            pid = os.fork()
+            if pid == 0:
+                # a worker exiting cleanly runs the exit handlers it inherited
+                logger.info(f"worker {worker}")
+                for handler in exit_handlers:
+                    handler()
+                os._exit(0)
+            os.waitpid(pid, 0)
+    finally:
+        for handler in exit_handlers:
+            handler()
+        logger.handlers.clear()
+
+    assert not listener._thread
+    messages = [
+        json.loads(line)["message"] for line in log_file.read_text().splitlines()
+    ]
+    assert messages == ["worker 0", "worker 1"]
+
+
+def test_log_writer_under_gevent_is_not_inherited_by_workers(tmp_path):
+    pytest.importorskip("gevent")
+    log_file = tmp_path / "app.log"
+    script = textwrap.dedent(
+        f"""
+        from gevent import monkey
+
+        monkey.patch_all()
+
+        import logging.handlers
+        import os
+
+        import gevent
+
+        from application import config
+
+        config.log_settings = lambda: {{"file": {str(log_file)!r}}}
+        listener = config.share_log_queue()
+        logger = logging.getLogger("test_gevent")
+        logger.addHandler(logging.handlers.QueueHandler(config.log_queue))
+
+        pid = os.fork()
+        if pid == 0:
+            # a worker runs its hub right after the fork
+            gevent.sleep(0.1)
+            logger.warning("worker")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        listener.stop()
+        """
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "AssertionError" not in result.stderr
+    messages = [
+        json.loads(line)["message"] for line in log_file.read_text().splitlines()
+    ]
+    assert messages == ["worker"]
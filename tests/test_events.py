@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from application import clients, events, models
+from application.breaker import OPEN, CircuitOpen
+
+from test_calendar_sync import FakeService, timed_event
+
+TIMEZONE = ZoneInfo("America/New_York")
+BOUNDARIES = [datetime(2025, 5, 8 + i, tzinfo=TIMEZONE) for i in range(8)]
+
+
+def at(day: int, hour: int) -> datetime:
+    return datetime(2025, 5, day, hour, tzinfo=TIMEZONE)
+
+
+def test_call_api_events_follows_all_pages():
+    service = FakeService(
+        [
+            {"items": [timed_event("a", 8)], "nextPageToken": "p2"},
+            {"items": [timed_event("b", 9)], "nextPageToken": "p3"},
+            {"items": [timed_event("c", 10)]},
+        ]
+    )
+
+    items = events.call_api_events(
+        "cal", BOUNDARIES[0], BOUNDARIES[-1], service, page_size=1
+    )
+
+    assert [e["id"] for e in items] == ["a", "b", "c"]
+    assert [r["pageToken"] for r in service.requests] == [None, "p2", "p3"]
+    assert service.requests[0]["maxResults"] == 1
+
+
+def test_day_span():
+    # timed event on one day
+    assert list(events.day_span(BOUNDARIES, at(9, 10), at(9, 11))) == [1]
+    # full day events cover whole days, end date exclusive
+    assert list(events.day_span(BOUNDARIES, BOUNDARIES[2], BOUNDARIES[4])) == [2, 3]
+    # timed event running over midnight
+    assert list(events.day_span(BOUNDARIES, at(9, 22), at(10, 2))) == [1, 2]
+    # started before the window
+    assert list(events.day_span(BOUNDARIES, at(7, 9), at(8, 9))) == [0]
+    # outside the window
+    assert list(events.day_span(BOUNDARIES, at(6, 9), at(7, 9))) == []
+    assert list(events.day_span(BOUNDARIES, at(15, 9), at(15, 10))) == []
+    # zero-length event at midnight
+    assert list(events.day_span(BOUNDARIES, BOUNDARIES[1], BOUNDARIES[1])) == [1]
+
+
+def test_update_events_cache_buckets_week(tmp_path, monkeypatch):
+    today = datetime.now(TIMEZONE).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def api_event(event_id: str, start: datetime, end: datetime) -> dict:
+        return {
+            "id": event_id,
+            "summary": event_id,
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": end.isoformat()},
+        }
+
+    replies = {
+        "family@example.com": [
+            api_event(
+                "dentist", today + timedelta(hours=9), today + timedelta(hours=10)
+            ),
+            api_event(
+                "trip",
+                today + timedelta(days=2, hours=18),
+                today + timedelta(days=4, hours=12),
+            ),
+            {
+                "id": "holiday",
+                "summary": "holiday",
+                "start": {"date": (today + timedelta(days=6)).date().isoformat()},
+                "end": {"date": (today + timedelta(days=7)).date().isoformat()},
+            },
+        ],
+        "food@example.com": [],
+    }
+    monkeypatch.setattr(events.clients, "get_calendar_service", lambda config: None)
+    monkeypatch.setattr(
+        events,
+        "fetch_calendars",
+        lambda config, calendar_ids, start_dt, end_dt: replies,
+    )
+    config = {
+        "timezone": "America/New_York",
+        "num_days": 7,
+        "cache_file": tmp_path / "events.json",
+        "direction_origin": "1 Home Street",
+        "google_maps_api_version": 1,
+        "google_maps_base_url": "https://www.google.com/maps/dir",
+        "common_locations": {},
+        "event_calendars": {"family": {"id": "family@example.com"}},
+        "food_calendar": {"id": "food@example.com"},
+    }
+
+    events_cache = events.update_events_cache(config)
+
+    assert len(events_cache.days) == 7
+    assert events_cache.days[0].day == today.date()
+    assert [[e.summary for e in day.events] for day in events_cache.days] == [
+        ["dentist"],
+        [],
+        ["trip"],
+        ["trip"],
+        ["trip"],
+        [],
+        ["holiday"],
+    ]
+    assert events_cache.days[6].events[0].full_day
+    assert isinstance(events_cache.days[0], models.EventsDay)
+
+
+def test_token_refresh_failures_open_the_calendar_circuit(monkeypatch):
+    monkeypatch.setattr(clients, "_breakers", {})
+    refreshes = []
+
+    def get_calendar_service(config):
+        refreshes.append(config)
+        raise TimeoutError("token endpoint timed out")
+
+    monkeypatch.setattr(clients, "get_calendar_service", get_calendar_service)
+    config = {"circuit_breaker": {"min_calls": 1, "open_seconds": 60}}
+
+    with pytest.raises(TimeoutError):
+        events.fetch_calendars(config, ["cal"], BOUNDARIES[0], BOUNDARIES[-1])
+    assert clients.get_breaker("google_calendar", config).state == OPEN
+
+    # the open circuit fails fast instead of waiting on the token endpoint
+    with pytest.raises(CircuitOpen):
+        events.fetch_calendars(config, ["cal"], BOUNDARIES[0], BOUNDARIES[-1])
+    assert len(refreshes) == 1
@@ -0,0 +1,70 @@
+import random
+
+from application.locations import LocationMatcher, get_location_matcher
+
+CONFIG = {
+    "direction_origin": "1 Home Street",
+    "google_maps_api_version": 1,
+    "google_maps_base_url": "https://www.google.com/maps/dir",
+    "common_locations": {
+        "12 School Road": "School",
+        "School Road": "School Road",
+        "Main St": "Main Street Shops",
+        "1 Home Street": "Home",
+    },
+}
+
+
+def linear_scan(location: str) -> str:
+    for root_address, friendly_name in CONFIG["common_locations"].items():
+        if root_address.lower() in location.lower():
+            return friendly_name
+    return location
+
+
+def test_friendly_name_follows_config_order():
+    matcher = LocationMatcher(CONFIG)
+
+    # "Main St" appears first in the text but "12 School Road" is listed first
+    assert matcher.display_name("Main St & 12 school road") == "School"
+    assert matcher.display_name("4 School Road") == "School Road"
+    assert matcher.display_name("Somewhere else") == "Somewhere else"
+    assert matcher.display_name(None) is None
+
+
+def test_friendly_name_matches_linear_scan():
+    matcher = LocationMatcher(CONFIG)
+    words = ["12", "School", "Road", "main", "St", "1", "Home", "Street", "Park"]
+    rng = random.Random(0)
+
+    for _ in range(500):
+        location = " ".join(rng.choices(words, k=rng.randint(1, 6)))
+        assert matcher.display_name(location) == linear_scan(location)
+
+
+def test_directions():
+    matcher = LocationMatcher(CONFIG)
+
+    assert matcher.directions("1 Home Street") is None
+    assert matcher.directions("https://meet.example.com/abc") == (
+        "https://meet.example.com/abc"
+    )
+    assert matcher.directions("4 School Road").startswith(
+        "https://www.google.com/maps/dir/?api=1&origin=1+Home+Street"
+    )
+
+
+def test_matcher_reused_until_settings_change():
+    matcher = get_location_matcher(CONFIG)
+
+    assert get_location_matcher(dict(CONFIG)) is matcher
+    assert (
+        get_location_matcher({**CONFIG, "common_locations": {"Park": "Park"}})
+        is not matcher
+    )
+
+
+def test_empty_common_locations():
+    matcher = LocationMatcher({**CONFIG, "common_locations": {}})
+
+    assert matcher.display_name("Main St") == "Main St"
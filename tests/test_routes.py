@@ -1,3 +1,20 @@
+WEATHER_DICT = {
+    "timestamp": 1746662400,
+    "last_updated": "05-07 20:00",
+    "current": {
+        "condition": "Clear - clear sky",
+        "icon": "01d",
+        "temperature": 25,
+        "wind_speed": 5,
+        "wind_deg": 90,
+        "cloud_coverage": 0,
+        "rain": None,
+        "snow": None,
+    },
+    "forecast": [],
+}
+
+
 def test_home_route(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -14,3 +31,137 @@ def test_events_route(client):
     response = client.get("/events")
     assert response.status_code == 200
     assert b"Last updated" in response.data
+
+
+def test_weather_route_conditional_request(client, monkeypatch):
+    monkeypatch.setattr("application.routes.get_weather", lambda config: WEATHER_DICT)
+
+    response = client.get("/weather")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+    response = client.get(
+        "/weather", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+
+def test_weather_route_marks_stale_weather(client, monkeypatch):
+    monkeypatch.setattr("application.routes.get_weather", lambda config: WEATHER_DICT)
+    fresh = client.get("/weather")
+    monkeypatch.setattr(
+        "application.routes.get_weather",
+        lambda config: {**WEATHER_DICT, "stale": True},
+    )
+
+    response = client.get("/weather")
+
+    assert b"stale since 05-07 20:00" in response.data
+    assert response.headers["ETag"] != fresh.headers["ETag"]
+
+
+def test_dashboard_route_swaps_both_widgets_out_of_band(client, monkeypatch):
+    def broken_events(config):
+        raise RuntimeError("calendar unavailable")
+
+    monkeypatch.setattr("application.routes.get_weather", lambda config: WEATHER_DICT)
+    monkeypatch.setattr("application.routes.get_events", broken_events)
+
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert b"Last updated" in response.data
+    assert b"something went wrong" in response.data
+    assert response.data.count(b'hx-swap-oob="true"') == 2
+
+
+def test_metrics_route(client):
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert b'panel_request_duration_seconds_count{route="/"}' in response.data
+
+
+def test_location_weather_route(client, monkeypatch):
+    app_config = client.application.config["APP_CONFIG"]
+    client.application.config["APP_CONFIG"] = {
+        **app_config,
+        "weather": {
+            **app_config["weather"],
+            "locations": {"cabin": {"lat": 45.0, "lon": -70.0}},
+        },
+    }
+    monkeypatch.setattr("application.routes.get_weather", lambda config: WEATHER_DICT)
+
+    response = client.get("/weather/cabin")
+    assert response.status_code == 200
+    assert b"Last updated" in response.data
+
+    assert client.get("/weather/nowhere").status_code == 404
+
+
+def test_tenant_routes_use_tenant_config(client, monkeypatch):
+    from application.config import build_tenant_config
+
+    app_config = client.application.config["APP_CONFIG"]
+    client.application.config["TENANT_CONFIGS"] = {
+        "smith": build_tenant_config(app_config, "smith", {"weather": {"lat": 1.0}})
+    }
+    configs = []
+
+    def get_weather(config):
+        configs.append(config)
+        return WEATHER_DICT
+
+    monkeypatch.setattr("application.routes.get_weather", get_weather)
+
+    response = client.get("/households/smith/weather")
+    assert response.status_code == 200
+    assert configs[-1]["lat"] == 1.0
+    assert "tenants/smith" in str(configs[-1]["cache_file"])
+
+    response = client.get("/households/smith/")
+    assert b"/households/smith/dashboard" in response.data
+    assert b"/households/smith/stream" in response.data
+
+    assert client.get("/households/jones/weather").status_code == 404
+    assert client.get("/households/smith/metrics").status_code == 404
+
+
+def test_events_route_renders_each_day(client, monkeypatch):
+    from datetime import datetime, timedelta
+    from zoneinfo import ZoneInfo
+
+    from application import events, models
+
+    config = client.application.config["APP_CONFIG"]["events"]
+    calendar = next(iter(config["event_calendars"]))
+    today = datetime.now(ZoneInfo(config["timezone"])).date()
+    start = datetime.combine(today, datetime.min.time(), ZoneInfo("UTC"))
+    events_cache = models.EventsCache(
+        timestamp=1746662400,
+        days=[
+            models.EventsDay(
+                day=today + timedelta(days=i),
+                events=[
+                    models.Event(
+                        calendar=calendar,
+                        summary=f"Event {i}",
+                        start=start,
+                        end=start,
+                        location="123 Main Street",
+                    )
+                ],
+            )
+            for i in range(3)
+        ],
+    )
+    monkeypatch.setattr(
+        "application.routes.get_events",
+        lambda config: events.build_events_view(config, events_cache),
+    )
+
+    response = client.get("/events")
+    assert response.status_code == 200
+    assert b"Today" in response.data
+    assert b"Tomorrow" in response.data
+    assert b"Event 2" in response.data
@@ -0,0 +1,59 @@
+import json
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from application import cache
+from application.serialization import IncompatibleCache, dumps, loads
+from application.store import FileStore
+
+
+class DummyCache(BaseModel):
+    timestamp: int
+    values: list[int] = []
+
+
+class OtherCache(BaseModel):
+    timestamp: int
+    name: str
+
+
+def test_round_trip_is_compact_with_header():
+    data = DummyCache(timestamp=100, values=[1, 2])
+
+    serialized = dumps(data)
+
+    header, payload = serialized.split("\n")
+    assert header.startswith("DummyCache/") and header.endswith(" 100")
+    assert payload == '{"timestamp":100,"values":[1,2]}'
+    assert loads(serialized, DummyCache) == data
+
+
+def test_entry_of_another_schema_is_incompatible():
+    serialized = dumps(OtherCache(timestamp=100, name="x"))
+
+    with pytest.raises(IncompatibleCache):
+        loads(serialized, DummyCache)
+    with pytest.raises(IncompatibleCache):
+        loads(json.dumps({"timestamp": 100}, indent=4), DummyCache)
+
+
+def test_file_store_reads_timestamp_from_header(tmp_path):
+    store = FileStore(tmp_path / "cache.json")
+
+    store.write(dumps(DummyCache(timestamp=123)), 123)
+
+    assert store.timestamp() == 123
+
+
+def test_cache_in_old_format_is_refreshed(tmp_path):
+    config = {
+        "cache_backend": "file",
+        "cache_file": tmp_path / "cache.json",
+        "cache_ttl": 60,
+    }
+    config["cache_file"].write_text(json.dumps({"timestamp": int(time.time())}))
+
+    assert cache.read_cache(config, DummyCache) is None
+    assert cache.read_timestamp(config) is None
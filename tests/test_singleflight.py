@@ -0,0 +1,56 @@
+import threading
+import time
+
+from application.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_refresh(tmp_path):
+    group = SingleFlight()
+    lock_path = str(tmp_path / "cache.lock")
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        time.sleep(0.1)
+        return "fresh"
+
+    results = []
+    coalesced = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                group.do(
+                    "key", lock_path, refresh, lambda: None, lambda: coalesced.append(1)
+                )
+            )
+        )
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["fresh"] * 8
+    assert group.stats() == {"key": {"leader": 1, "coalesced": 7}}
+    assert len(coalesced) == 7
+
+
+def test_recheck_result_skips_refresh(tmp_path):
+    group = SingleFlight()
+    lock_path = str(tmp_path / "cache.lock")
+
+    coalesced = []
+
+    result = group.do(
+        "key",
+        lock_path,
+        lambda: "refreshed",
+        lambda: "cached",
+        lambda: coalesced.append(1),
+    )
+
+    assert result == "cached"
+    assert group.stats() == {"key": {"leader": 0, "coalesced": 1}}
+    assert len(coalesced) == 1
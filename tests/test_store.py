@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+from pydantic import BaseModel
+
+from application import cache
+from application.store import FileStore, SQLiteStore, get_store
+
+
+class DummyCache(BaseModel):
+    timestamp: int
+
+
+def test_sqlite_is_default_backend(tmp_path):
+    config = {"cache_file": tmp_path / "weather.json"}
+
+    store = get_store(config)
+
+    assert isinstance(store, SQLiteStore)
+    assert store.db_path == str(tmp_path / "cache.db")
+    assert isinstance(get_store({**config, "cache_backend": "file"}), FileStore)
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteStore(tmp_path / "cache.db", "weather")
+
+    with pytest.raises(FileNotFoundError):
+        store.version()
+
+    store.write(json.dumps({"timestamp": 100}), 100)
+    version = store.version()
+    assert store.timestamp() == 100
+    assert json.loads(store.read()) == {"timestamp": 100}
+
+    store.write(json.dumps({"timestamp": 200}), 200)
+    assert store.version() != version
+    assert store.timestamp() == 200
+
+    store.delete()
+    with pytest.raises(FileNotFoundError):
+        store.read()
+
+
+def test_sqlite_store_keeps_history(tmp_path):
+    store = SQLiteStore(tmp_path / "cache.db", "weather", history=3)
+    for timestamp in range(10):
+        store.write("{}", timestamp)
+
+    with store._connection() as connection:
+        rows = connection.execute(
+            "SELECT timestamp FROM cache_entries ORDER BY version"
+        ).fetchall()
+    assert [row[0] for row in rows] == [7, 8, 9]
+
+
+def test_sqlite_store_concurrent_writers(tmp_path):
+    def write(n: int):
+        store = SQLiteStore(tmp_path / "cache.db", "events")
+        for i in range(20):
+            store.write(json.dumps({"timestamp": n * 100 + i}), n * 100 + i)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SQLiteStore(tmp_path / "cache.db", "events").version() == (80,)
+
+
+def test_cache_reads_through_sqlite_store(tmp_path):
+    config = {"cache_file": tmp_path / "cache.json", "cache_ttl": 60}
+
+    assert cache.read_timestamp(config) is None
+    cache.write_cache(config, DummyCache(timestamp=123))
+
+    first = cache.read_cache(config, DummyCache)
+    assert first.timestamp == 123
+    assert cache.read_cache(config, DummyCache) is first
+    assert cache.read_timestamp(config) == 123
+
+
+def test_sqlite_store_shares_one_connection_per_process(tmp_path, monkeypatch):
+    store = SQLiteStore(tmp_path / "cache.db", "weather")
+    store.write(json.dumps({"timestamp": 100}), 100)
+    connects = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(
+        sqlite3,
+        "connect",
+        lambda *args, **kwargs: connects.append(1) or connect(*args, **kwargs),
+    )
+
+    threads = [threading.Thread(target=store.version) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert connects == []
+
+
+def test_sqlite_store_recreates_removed_database(tmp_path):
+    config = {"cache_file": tmp_path / "cache.json", "cache_ttl": 60}
+    cache.write_cache(config, DummyCache(timestamp=123))
+
+    for path in tmp_path.glob("cache.db*"):
+        os.remove(path)
+    assert cache.read_timestamp(config) is None
+    assert cache.read_cache(config, DummyCache) is None
+
+    cache.write_cache(config, DummyCache(timestamp=456))
+    assert cache.read_cache(config, DummyCache).timestamp == 456
+
+
+def test_unreadable_database_is_a_cache_miss(tmp_path):
+    config = {"cache_file": tmp_path / "cache.json", "cache_ttl": 60}
+    (tmp_path / "cache.db").write_text("not a database" * 100)
+
+    assert cache.read_timestamp(config) is None
+    assert cache.read_cache(config, DummyCache) is None
@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from application import cache, clients, models, scheduler, weather
+from application.breaker import CLOSED, OPEN
+from application.ratelimit import RateBudget, RateBudgetExceeded
+
+
+def make_config(tmp_path, **locations) -> dict:
+    return {
+        "base_url": "http://127.0.0.1:9/data/2.5",
+        "api_key": "x",
+        "units": "metric",
+        "num_days": 1,
+        "timezone": "UTC",
+        "cache_ttl": 600,
+        "cache_file": tmp_path / "weather.json",
+        "rate_limit_per_minute": 0,
+        "locations": locations,
+    }
+
+
+def make_weather(timestamp: int) -> models.WeatherCache:
+    return models.WeatherCache(
+        timestamp=timestamp,
+        current=models.CurrentWeather(
+            condition="Clear",
+            icon="01d",
+            temperature=20,
+            wind_speed=0,
+            wind_deg=0,
+            cloud_coverage=0,
+        ),
+        forecast=[],
+    )
+
+
+def test_location_configs_get_own_cache_files(tmp_path):
+    config = make_config(
+        tmp_path,
+        home={"lat": 40.0, "lon": -75.0},
+        cabin={"lat": 45.0, "lon": -70.0, "units": "imperial"},
+    )
+
+    configs = weather.location_configs(config)
+
+    assert list(configs) == ["home", "cabin"]
+    assert configs["home"]["cache_file"] == tmp_path / "weather.home.json"
+    assert configs["cabin"]["units"] == "imperial"
+    assert "locations" not in configs["home"]
+    assert weather.default_location(config) == "home"
+    assert weather.location_configs(config) is configs
+
+
+def test_single_location_config_is_unchanged(tmp_path):
+    config = make_config(tmp_path)
+    del config["locations"]
+    config.update({"lat": 40.0, "lon": -75.0})
+
+    assert weather.location_configs(config) == {"default": config}
+
+
+def test_identical_coordinates_share_one_fetch(tmp_path, monkeypatch):
+    config = make_config(
+        tmp_path,
+        home={"lat": 40.0, "lon": -75.0},
+        office={"lat": 40.0, "lon": -75.0},
+        cabin={"lat": 45.0, "lon": -70.0},
+    )
+    configs = weather.location_configs(config)
+    fetched = []
+
+    def fetch_weather(location_config):
+        fetched.append(location_config["location"])
+        time.sleep(0.05)
+        return make_weather(int(time.time()))
+
+    monkeypatch.setattr(weather, "fetch_weather", fetch_weather)
+
+    threads = [
+        threading.Thread(target=weather.update_weather_cache, args=(c,))
+        for c in configs.values()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # a twin holding fresh data newer than the location's own is copied
+    cache.write_cache(configs["office"], make_weather(int(time.time()) - 300))
+    weather.update_weather_cache(configs["office"])
+
+    assert sorted(fetched) in (["cabin", "home"], ["cabin", "office"])
+    for location_config in configs.values():
+        assert cache.read_cache(location_config, models.WeatherCache) is not None
+
+
+def test_scheduled_twins_fetch_once_ahead_of_expiry(tmp_path, monkeypatch):
+    config = make_config(
+        tmp_path,
+        home={"lat": 41.0, "lon": -74.0},
+        office={"lat": 41.0, "lon": -74.0},
+    )
+    # the location jobs; the trailing events job is not run
+    jobs = scheduler.refresh_jobs(
+        {"weather": config, "events": config}, {"lead_time": 30, "jitter": 10}
+    )[:-1]
+    # both caches are copies of one fetch, 20s from expiry
+    about_to_expire = make_weather(int(time.time()) - 580)
+    for job in jobs:
+        cache.write_cache(job.config, about_to_expire)
+    fetched = []
+
+    def fetch_weather(location_config):
+        fetched.append(location_config["location"])
+        return make_weather(int(time.time()))
+
+    monkeypatch.setattr(weather, "fetch_weather", fetch_weather)
+
+    for job in jobs:
+        job.run()
+
+    assert fetched == ["home"]
+    for job in jobs:
+        assert cache.is_fresh(
+            job.config, cache.read_cache(job.config, models.WeatherCache), margin=500
+        )
+        assert job.next_run > time.time() + 500
+
+
+def test_rate_budget_allows_burst_then_refuses(tmp_path):
+    budget = RateBudget(tmp_path / "budget", rate=3)
+
+    for _ in range(3):
+        budget.acquire(max_wait=0)
+    with pytest.raises(RateBudgetExceeded):
+        budget.acquire(max_wait=0)
+
+    # the bucket is shared through the state file
+    with pytest.raises(RateBudgetExceeded):
+        RateBudget(tmp_path / "budget", rate=3).acquire(max_wait=0)
+
+
+def test_half_open_probe_lets_both_weather_calls_through(tmp_path, monkeypatch):
+    config = make_config(tmp_path)
+    del config["locations"]
+    config.update(
+        {
+            "lat": 40.0,
+            "lon": -75.0,
+            "circuit_breaker": {"min_calls": 1, "open_seconds": 0},
+        }
+    )
+    monkeypatch.setattr(clients, "_breakers", {})
+    breaker = clients.get_breaker("openweather", config)
+    with pytest.raises(RuntimeError):
+        with breaker.call():
+            raise RuntimeError("upstream down")
+    assert breaker.state == OPEN
+
+    both_in_flight = threading.Barrier(2, timeout=5)
+
+    def get_json(config, endpoint, url):
+        both_in_flight.wait()
+        if endpoint == "forecast":
+            return {"list": []}
+        return {
+            "weather": [{"main": "Clear", "description": "clear sky", "icon": "01d"}],
+            "main": {"temp": 20},
+            "wind": {"speed": 1, "deg": 90},
+            "clouds": {"all": 0},
+        }
+
+    monkeypatch.setattr(weather, "get_json", get_json)
+
+    weather_cache = weather.fetch_weather(config)
+
+    assert weather_cache.current.temperature == 20
+    assert breaker.state == CLOSED